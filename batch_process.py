@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Headless batch processing of recorded sessions
+
+Runs the object, currency, OCR and scene pipelines over a video file or an
+image folder and writes one JSON line per frame. Frames are grouped into
+batches so each model makes one predict call per batch, and batches can be
+spread over several worker processes.
+
+    python batch_process.py session.mp4 -o session.jsonl
+    python batch_process.py recordings/ --tasks objects currency --batch-size 16 --workers 4
+"""
+
+import argparse
+import itertools
+import json
+import multiprocessing as mp
+import os
+import sys
+import time
+from collections import deque
+
+import cv2
+import numpy as np
+
+from modules.utils import validate_image_format
+
+# Numbers each run() in this process, so frame indices of different runs
+# never share entries in the per-frame result cache
+_run_ids = itertools.count()
+
+TASKS = ("objects", "currency", "ocr", "scene")
+
+
+# ---------------- Input ----------------
+def iter_frames(source, stride=1):
+    """Yield (index, timestamp seconds or None, name, frame) from a video or image folder"""
+    if os.path.isdir(source):
+        names = sorted(n for n in os.listdir(source) if validate_image_format(n))
+        for index, name in enumerate(names[::stride]):
+            frame = cv2.imread(os.path.join(source, name))
+            if frame is not None:
+                yield index * stride, None, name, frame
+        return
+
+    cap = cv2.VideoCapture(source)
+    if not cap.isOpened():
+        raise IOError(f"Cannot open video: {source}")
+    index = 0
+    try:
+        while True:
+            if index % stride:
+                # grab() skips decoding frames that are not processed
+                if not cap.grab():
+                    break
+                index += 1
+                continue
+            ret, frame = cap.read()
+            if not ret:
+                break
+            yield index, cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0, None, frame
+            index += 1
+    finally:
+        cap.release()
+
+
+def iter_batches(frames, batch_size):
+    batch = []
+    for item in frames:
+        batch.append(item)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# ---------------- Worker ----------------
+def _init_worker(threads):
+    # Model modules log with print(); keep stdout free for the JSONL stream
+    sys.stdout = sys.stderr
+    # Set before torch/onnxruntime are imported so workers do not oversubscribe the CPU
+    if threads:
+        for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+            os.environ[var] = str(threads)
+
+
+def process_batch(batch, tasks, precision=None, run_id=None):
+    """Run ``tasks`` over one batch of (index, timestamp, name, frame).
+
+    Currency comes back as raw per-frame scores; smoothing over frames is
+    done by the caller in frame order, so it does not depend on how batches
+    were split across workers. ``run_id`` tells this run's frames apart
+    from another source's frames with the same index.
+    """
+    frames = [item[3] for item in batch]
+    frame_ids = [(run_id, item[0]) for item in batch]
+    output = {}
+    timings = {}
+
+    if "objects" in tasks:
+        from modules import object_detector
+        started = time.perf_counter()
+        detections = object_detector.detect_objects_in_frames(frames, frame_ids=frame_ids, precision=precision)
+        output["objects"] = [d.to_dicts() for d in detections]
+        timings["objects"] = time.perf_counter() - started
+
+    if "scene" in tasks:
+        from modules import scene_description
+        started = time.perf_counter()
+        scenes = scene_description.describe_scenes_for_blind_user(frames, frame_ids)
+        output["scene"] = [s["overall_description"] for s in scenes]
+        timings["scene"] = time.perf_counter() - started
+
+    if "currency" in tasks:
+        from modules import currency_detector
+        started = time.perf_counter()
+        scores = currency_detector.currency_scores_in_frames(frames, frame_ids, precision=precision)
+        output["currency"] = None if scores is None else [s.tolist() for s in scores]
+        timings["currency"] = time.perf_counter() - started
+
+    if "ocr" in tasks:
+        from modules import ocr_reader
+        started = time.perf_counter()
+        output["ocr"] = ocr_reader.read_text_from_frames(frames)
+        timings["ocr"] = time.perf_counter() - started
+
+    return output, timings
+
+
+# ---------------- Driver ----------------
+def _records(batch, output, source, currency_session):
+    for i, (index, timestamp, name, _) in enumerate(batch):
+        record = {"source": source, "frame": index}
+        if timestamp is not None:
+            record["timestamp"] = round(timestamp, 3)
+        if name is not None:
+            record["image"] = name
+        if "objects" in output:
+            record["objects"] = output["objects"][i]
+        if "currency" in output:
+            scores = output["currency"]
+            if scores is None:
+                record["currency"] = {"currency_detected": False, "denomination": None, "confidence": 0.0}
+            else:
+                record["currency"] = currency_session.update(np.asarray(scores[i], dtype=np.float32))
+        if "ocr" in output:
+            record["text"] = output["ocr"][i]
+        if "scene" in output:
+            record["scene"] = output["scene"][i]
+        yield record
+
+
+def run(source, out, tasks, batch_size=8, workers=1, stride=1, precision=None):
+    """Process ``source`` and write JSONL records to ``out`` in frame order"""
+    # Smoothing runs here, in frame order, on this source's own history
+    currency_session = None
+    if "currency" in tasks:
+        from modules.currency_detector import CurrencySession
+        currency_session = CurrencySession()
+
+    run_id = next(_run_ids)
+    totals = {task: 0.0 for task in tasks}
+    frames_done = 0
+    started = time.time()
+
+    def emit(batch, result):
+        nonlocal frames_done
+        output, timings = result
+        for task, seconds in timings.items():
+            totals[task] += seconds
+        for record in _records(batch, output, source, currency_session):
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+        frames_done += len(batch)
+        elapsed = time.time() - started
+        print(f"\r[batch] {frames_done} frames, {frames_done / max(elapsed, 1e-9):.1f} fps",
+              end="", file=sys.stderr, flush=True)
+
+    batches = iter_batches(iter_frames(source, stride), batch_size)
+    if workers <= 1:
+        for batch in batches:
+            emit(batch, process_batch(batch, tasks, precision, run_id))
+    else:
+        threads = max(1, (os.cpu_count() or 1) // workers)
+        ctx = mp.get_context("spawn")
+        with ctx.Pool(workers, initializer=_init_worker, initargs=(threads,)) as pool:
+            # Bounded look-ahead keeps memory flat on long videos; results are
+            # written in submission order so the output stays in frame order
+            pending = deque()
+            for batch in batches:
+                pending.append((batch, pool.apply_async(process_batch, (batch, tasks, precision, run_id))))
+                if len(pending) >= workers * 2:
+                    done, result = pending.popleft()
+                    emit(done, result.get())
+            while pending:
+                done, result = pending.popleft()
+                emit(done, result.get())
+
+    elapsed = time.time() - started
+    print(file=sys.stderr)
+    summary = {"frames": frames_done, "seconds": round(elapsed, 2),
+               "fps": round(frames_done / max(elapsed, 1e-9), 2),
+               "task_seconds": {task: round(seconds, 2) for task, seconds in totals.items()}}
+    print(f"[batch] done: {json.dumps(summary)}", file=sys.stderr)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Process a recorded video or image folder offline")
+    parser.add_argument("source", help="video file or folder of images")
+    parser.add_argument("-o", "--output", help="JSONL output file (default: stdout)")
+    parser.add_argument("--tasks", nargs="+", choices=TASKS, default=list(TASKS),
+                        help="pipelines to run (default: all)")
+    parser.add_argument("--batch-size", type=int, default=8, help="frames per predict call")
+    parser.add_argument("--workers", type=int, default=1, help="worker processes (default: 1, in-process)")
+    parser.add_argument("--stride", type=int, default=1, help="process every Nth frame")
+    parser.add_argument("--int8", action="store_true", help="run the YOLO detectors quantized")
+    args = parser.parse_args()
+
+    if args.batch_size < 1 or args.stride < 1:
+        parser.error("--batch-size and --stride must be at least 1")
+    if not os.path.exists(args.source):
+        parser.error(f"{args.source} does not exist")
+
+    if args.output:
+        out = open(args.output, "w", encoding="utf-8")
+    else:
+        # Model modules log with print(); keep stdout free for the JSONL stream
+        out, sys.stdout = sys.stdout, sys.stderr
+    try:
+        run(args.source, out, tuple(args.tasks), args.batch_size, args.workers,
+            args.stride, "int8" if args.int8 else None)
+    finally:
+        if args.output:
+            out.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
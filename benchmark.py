@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Latency benchmark for the recognition modules
+
+Replays a fixed set of frames through OCR, object detection, currency
+detection, scene description and the TTS hand-off, and reports p50/p95/p99
+latency, throughput and peak memory per module as JSON. Each module runs in
+its own process so its load time and memory are measured on their own.
+
+Fixtures are read from assets/benchmark/<category>/ (document, street,
+currency). A category with no images falls back to generated frames, which
+are seeded and therefore the same on every run.
+
+    python benchmark.py --save-baseline bench_baseline.json
+    python benchmark.py --baseline bench_baseline.json --output bench.json
+"""
+
+import argparse
+import importlib
+import json
+import multiprocessing as mp
+import os
+import platform
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from modules.utils import peak_rss_mb, rss_mb, validate_image_format
+
+_root_dir = os.path.dirname(os.path.abspath(__file__))
+FIXTURES_DIR = os.path.join(_root_dir, "assets", "benchmark")
+
+# name -> (fixture category, module, function); every function takes one frame
+SUITES = {
+    "ocr": ("document", "modules.ocr_reader", "read_text_from_frame"),
+    "objects": ("street", "modules.object_detector", "detect_objects_in_frame"),
+    "currency": ("currency", "modules.currency_detector", "detect_currency_in_frame"),
+    "scene": ("street", "modules.scene_description", "describe_scene_for_blind_user"),
+    "tts": ("sentences", "modules.tts_engine", "speak_text"),
+}
+
+# Extra keyword arguments per suite; speak_text is timed until the sentence
+# has been spoken, not until its background thread has started
+SUITE_OPTIONS = {
+    "tts": {"async_mode": False},
+}
+
+SENTENCES = [
+    "Car approaching from the left.",
+    "Detected 100 rupee note with confidence 0.92.",
+    "Person ahead, about two meters.",
+    "The scene is well-lit with even lighting. I can see: chair, table, laptop.",
+]
+
+# Metrics compared against a baseline; larger is worse except for throughput
+COMPARED_METRICS = ("p50_ms", "p95_ms", "p99_ms", "throughput_per_s", "peak_rss_mb")
+
+
+# ---------------- Fixtures ----------------
+def _synthetic_frames(category, count=6, size=(480, 640)):
+    rng = np.random.default_rng(sum(map(ord, category)))
+    frames = []
+    for i in range(count):
+        if category == "document":
+            frame = np.full(size + (3,), 245, dtype=np.uint8)
+            for line in range(8):
+                words = " ".join(rng.choice(["the", "quick", "brown", "fox", "reads", "text", "page", "line"], 4))
+                cv2.putText(frame, words, (30, 50 + line * 50), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (20, 20, 20), 2)
+        elif category == "currency":
+            frame = rng.integers(60, 120, size + (3,), dtype=np.uint8)
+            color = tuple(int(c) for c in rng.integers(80, 220, 3))
+            cv2.rectangle(frame, (120, 140), (520, 340), color, -1)
+            cv2.putText(frame, str(rng.choice([10, 20, 50, 100, 200, 500])), (260, 260),
+                        cv2.FONT_HERSHEY_SIMPLEX, 2.0, (30, 30, 30), 4)
+        else:
+            frame = np.zeros(size + (3,), dtype=np.uint8)
+            frame[: size[0] // 2] = (200, 170, 140)
+            frame[size[0] // 2:] = (90, 90, 90)
+            for _ in range(5):
+                x, y = int(rng.integers(0, size[1] - 120)), int(rng.integers(size[0] // 3, size[0] - 100))
+                color = tuple(int(c) for c in rng.integers(0, 255, 3))
+                cv2.rectangle(frame, (x, y), (x + int(rng.integers(40, 120)), y + int(rng.integers(40, 100))), color, -1)
+        frames.append(frame)
+    return frames
+
+
+def load_fixtures(category, fixtures_dir=FIXTURES_DIR):
+    """Return (frames, source) for one fixture category"""
+    if category == "sentences":
+        return SENTENCES, "builtin"
+    folder = os.path.join(fixtures_dir, category)
+    frames = []
+    if os.path.isdir(folder):
+        for name in sorted(os.listdir(folder)):
+            if validate_image_format(name):
+                frame = cv2.imread(os.path.join(folder, name))
+                if frame is not None:
+                    frames.append(frame)
+    if frames:
+        return frames, folder
+    return _synthetic_frames(category), "synthetic"
+
+
+# ---------------- Measurement ----------------
+def percentiles(samples_ms):
+    p50, p95, p99 = np.percentile(samples_ms, [50, 95, 99])
+    return {"p50_ms": round(float(p50), 2), "p95_ms": round(float(p95), 2), "p99_ms": round(float(p99), 2)}
+
+
+def run_suite(name, inputs, iterations):
+    """Time one module over ``inputs``; runs in a fresh process"""
+    _, module_name, function_name = SUITES[name]
+    rss_before = rss_mb()
+    try:
+        module = importlib.import_module(module_name)
+    except Exception as e:
+        return {"status": "skipped", "reason": f"{type(e).__name__}: {e}"}
+    function = getattr(module, function_name)
+    options = SUITE_OPTIONS.get(name, {})
+    if name == "ocr":
+        # The fixtures repeat, so cached results would be timed instead of OCR
+        module.ocr_reader.result_cache.capacity = 0
+    warm_up = getattr(module, "warm_up", None)
+    engine_ready = bool(warm_up()) if warm_up else True
+
+    # First call is reported on its own: it pays for lazy loading and graph setup
+    started = time.perf_counter()
+    function(inputs[0], **options)
+    first_call_ms = (time.perf_counter() - started) * 1000
+
+    samples = []
+    started_all = time.perf_counter()
+    for i in range(iterations):
+        item = inputs[i % len(inputs)]
+        started = time.perf_counter()
+        function(item, **options)
+        samples.append((time.perf_counter() - started) * 1000)
+    total = time.perf_counter() - started_all
+
+    report = {
+        "status": "ok",
+        "engine_ready": engine_ready,
+        "calls": iterations,
+        "first_call_ms": round(first_call_ms, 2),
+        "mean_ms": round(float(np.mean(samples)), 2),
+        "throughput_per_s": round(iterations / total, 2),
+        "rss_delta_mb": round(rss_mb() - rss_before, 1),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+    report.update(percentiles(samples))
+    return report
+
+
+def _init_worker():
+    # Modules log with print(); keep stdout free for the JSON report
+    sys.stdout = sys.stderr
+
+
+def _run_isolated(name, inputs, iterations):
+    ctx = mp.get_context("spawn")
+    with ctx.Pool(1, initializer=_init_worker) as pool:
+        return pool.apply(run_suite, (name, inputs, iterations))
+
+
+def run(suites, iterations, fixtures_dir=FIXTURES_DIR):
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "iterations": iterations,
+        },
+        "results": {},
+    }
+    for name in suites:
+        inputs, source = load_fixtures(SUITES[name][0], fixtures_dir)
+        print(f"[benchmark] {name}: {iterations} calls over {len(inputs)} inputs ({source})", file=sys.stderr)
+        result = _run_isolated(name, inputs, iterations)
+        result["fixtures"] = source
+        report["results"][name] = result
+    return report
+
+
+# ---------------- Baseline ----------------
+def compare(report, baseline, tolerance=0.10):
+    """Return (rows, regressions) comparing ``report`` to ``baseline``"""
+    rows, regressions = [], []
+    for name, current in report["results"].items():
+        previous = baseline.get("results", {}).get(name)
+        if not previous or current.get("status") != "ok" or previous.get("status") != "ok":
+            continue
+        for metric in COMPARED_METRICS:
+            old, new = previous.get(metric), current.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            worse = -change if metric == "throughput_per_s" else change
+            regressed = worse > tolerance
+            rows.append((name, metric, old, new, change, regressed))
+            if regressed:
+                regressions.append(f"{name} {metric}: {old} -> {new} ({change:+.1%})")
+    return rows, regressions
+
+
+def print_comparison(rows):
+    print(f"{'module':<10}{'metric':<18}{'baseline':>12}{'current':>12}{'change':>10}", file=sys.stderr)
+    for name, metric, old, new, change, regressed in rows:
+        flag = "  REGRESSED" if regressed else ""
+        print(f"{name:<10}{metric:<18}{old:>12}{new:>12}{change:>+10.1%}{flag}", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the recognition modules on fixed frames")
+    parser.add_argument("--suites", nargs="+", choices=list(SUITES), default=list(SUITES),
+                        help="modules to benchmark (default: all)")
+    parser.add_argument("--iterations", type=int, default=50, help="timed calls per module")
+    parser.add_argument("--fixtures", default=FIXTURES_DIR, help="fixture root with one folder per category")
+    parser.add_argument("--output", help="write the JSON report here (default: stdout)")
+    parser.add_argument("--baseline", help="compare against this saved report")
+    parser.add_argument("--save-baseline", help="also save the report as a new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.10,
+                        help="allowed slowdown before a metric counts as a regression (default: 0.10)")
+    args = parser.parse_args()
+
+    report = run(args.suites, args.iterations, args.fixtures)
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        rows, regressions = compare(report, baseline, args.tolerance)
+        print_comparison(rows)
+        report["regressions"] = regressions
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+        print(f"[benchmark] baseline saved to {args.save_baseline}", file=sys.stderr)
+
+    if regressions:
+        print(f"[benchmark] {len(regressions)} regression(s) beyond {args.tolerance:.0%}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Compare FP32 and INT8 detectors on a labelled image folder
+
+objects:  the COCO detector (models/yolov8n.pt). Images carry YOLO-format
+          labels, either next to each image (name.txt) or in a sibling
+          labels/ directory. Reports mAP@0.5 and mAP@0.5:0.95.
+currency: the currency model (models/best.pt). Images sit in one sub-folder
+          per denomination (10/, 100/, 500/, ...). Reports accuracy.
+
+Every precision runs in its own process so load time and memory are not
+mixed up between the two models.
+
+    python compare_quantization.py objects data/street
+    python compare_quantization.py currency data/banknotes --backend openvino --json report.json
+"""
+
+import argparse
+import json
+import multiprocessing as mp
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from modules import model_registry
+from modules.utils import peak_rss_mb, rss_mb, validate_image_format
+
+WEIGHTS = {"objects": "yolov8n.pt", "currency": "best.pt"}
+IOU_THRESHOLDS = np.linspace(0.5, 0.95, 10)
+
+
+# ---------------- Dataset ----------------
+def list_images(folder):
+    images = []
+    for root, _, files in os.walk(folder):
+        for name in sorted(files):
+            if validate_image_format(name):
+                images.append(os.path.join(root, name))
+    return sorted(images)
+
+
+def _label_path(image_path):
+    stem = os.path.splitext(image_path)[0]
+    beside = stem + ".txt"
+    if os.path.isfile(beside):
+        return beside
+    folder, name = os.path.split(stem)
+    return os.path.join(os.path.dirname(folder), "labels", name + ".txt")
+
+
+def load_yolo_labels(image_path, width, height):
+    """Ground truth as (class ids, xyxy pixel boxes) from a YOLO label file"""
+    path = _label_path(image_path)
+    if not os.path.isfile(path):
+        return np.zeros(0, dtype=np.int64), np.zeros((0, 4))
+    rows = np.loadtxt(path, ndmin=2)
+    if rows.size == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros((0, 4))
+    cx, cy, w, h = rows[:, 1] * width, rows[:, 2] * height, rows[:, 3] * width, rows[:, 4] * height
+    boxes = np.stack([cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2], axis=1)
+    return rows[:, 0].astype(np.int64), boxes
+
+
+def currency_label(image_path, root):
+    return os.path.relpath(image_path, root).split(os.sep)[0]
+
+
+# ---------------- Metrics ----------------
+def box_iou(a, b):
+    """Pairwise IoU between (N, 4) and (M, 4) xyxy boxes"""
+    tl = np.maximum(a[:, None, :2], b[None, :, :2])
+    br = np.minimum(a[:, None, 2:], b[None, :, 2:])
+    inter = np.prod(np.clip(br - tl, 0, None), axis=2)
+    area_a = np.prod(a[:, 2:] - a[:, :2], axis=1)
+    area_b = np.prod(b[:, 2:] - b[:, :2], axis=1)
+    return inter / (area_a[:, None] + area_b[None, :] - inter + 1e-9)
+
+
+def average_precision(recall, precision):
+    """Area under the interpolated precision/recall curve (101 points, COCO)"""
+    recall = np.concatenate([[0.0], recall, [1.0]])
+    precision = np.concatenate([[1.0], precision, [0.0]])
+    precision = np.maximum.accumulate(precision[::-1])[::-1]
+    points = np.linspace(0, 1, 101)
+    return float(np.mean(precision[np.searchsorted(recall, points, side="left").clip(max=len(precision) - 1)]))
+
+
+def mean_average_precision(samples):
+    """mAP over IOU_THRESHOLDS for [(pred cls, conf, boxes, gt cls, gt boxes)]"""
+    classes = set()
+    for _, _, _, gt_cls, _ in samples:
+        classes.update(gt_cls.tolist())
+    if not classes:
+        return 0.0, 0.0
+
+    ap = np.zeros((len(classes), len(IOU_THRESHOLDS)))
+    for ci, c in enumerate(sorted(classes)):
+        scores, hits, n_gt = [], [], 0
+        for pred_cls, conf, boxes, gt_cls, gt_boxes in samples:
+            p, g = pred_cls == c, gt_cls == c
+            n_gt += int(g.sum())
+            if not p.any():
+                continue
+            order = np.argsort(-conf[p])
+            p_boxes, p_conf = boxes[p][order], conf[p][order]
+            iou = box_iou(p_boxes, gt_boxes[g]) if g.any() else np.zeros((len(p_boxes), 0))
+            matched = np.zeros((len(IOU_THRESHOLDS), iou.shape[1]), dtype=bool)
+            tp = np.zeros((len(p_boxes), len(IOU_THRESHOLDS)), dtype=bool)
+            for i in range(len(p_boxes)):
+                for t, threshold in enumerate(IOU_THRESHOLDS):
+                    candidates = np.where((iou[i] >= threshold) & ~matched[t])[0]
+                    if len(candidates):
+                        j = candidates[np.argmax(iou[i, candidates])]
+                        matched[t, j] = True
+                        tp[i, t] = True
+            scores.append(p_conf)
+            hits.append(tp)
+        if n_gt == 0 or not scores:
+            continue
+        order = np.argsort(-np.concatenate(scores))
+        tp = np.concatenate(hits)[order]
+        cum_tp = np.cumsum(tp, axis=0)
+        cum_fp = np.cumsum(~tp, axis=0)
+        for t in range(len(IOU_THRESHOLDS)):
+            recall = cum_tp[:, t] / n_gt
+            precision = cum_tp[:, t] / (cum_tp[:, t] + cum_fp[:, t])
+            ap[ci, t] = average_precision(recall, precision)
+    return float(ap[:, 0].mean()), float(ap.mean())
+
+
+# ---------------- Evaluation ----------------
+def evaluate(kind, folder, precision, backend, imgsz):
+    """Run one model variant over the folder; executed in a fresh process"""
+    from modules import currency_detector
+
+    weights = model_registry.resolve_model_path(WEIGHTS[kind])
+    key = model_registry.model_key(weights, backend, precision)
+    rss_before = rss_mb()
+    started = time.perf_counter()
+    model = model_registry.load_yolo(key.path, key.backend, key.precision)
+    # Weights are read and the graph is built on the first predict, so the
+    # load figures include one warm-up call
+    model.predict(np.zeros((imgsz, imgsz, 3), dtype=np.uint8), imgsz=imgsz, verbose=False)
+    load_ms = (time.perf_counter() - started) * 1000
+    model_rss = rss_mb() - rss_before
+
+    images = list_images(folder)
+    latencies, samples, correct = [], [], {}
+    for path in images:
+        frame = cv2.imread(path)
+        if frame is None:
+            continue
+        started = time.perf_counter()
+        result = model.predict(frame, imgsz=imgsz, verbose=False)[0]
+        latencies.append((time.perf_counter() - started) * 1000)
+
+        if kind == "objects":
+            data = result.boxes.data.cpu().numpy()
+            gt_cls, gt_boxes = load_yolo_labels(path, frame.shape[1], frame.shape[0])
+            samples.append((data[:, -1].astype(np.int64), data[:, -2], data[:, :4], gt_cls, gt_boxes))
+        else:
+            scores = currency_detector.denomination_scores(result)
+            predicted = currency_detector.CURRENCY_CLASSES[int(np.argmax(scores))] if scores.sum() else None
+            label = currency_label(path, folder)
+            correct.setdefault(label, []).append(predicted == label)
+
+    report = {
+        "precision": key.precision,
+        "backend": key.backend,
+        "images": len(images),
+        "load_ms": round(load_ms, 1),
+        "model_rss_mb": round(model_rss, 1),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+    if latencies:
+        report.update({
+            "latency_p50_ms": round(float(np.percentile(latencies, 50)), 2),
+            "latency_p95_ms": round(float(np.percentile(latencies, 95)), 2),
+            "fps": round(1000 / float(np.mean(latencies)), 2),
+        })
+    if kind == "objects":
+        map50, map50_95 = mean_average_precision(samples)
+        report.update({"mAP50": round(map50, 4), "mAP50_95": round(map50_95, 4)})
+    else:
+        total = sum(len(v) for v in correct.values())
+        report["accuracy"] = round(sum(sum(v) for v in correct.values()) / max(total, 1), 4)
+        report["per_denomination"] = {k: round(sum(v) / len(v), 4) for k, v in sorted(correct.items())}
+    return report
+
+
+def _evaluate_isolated(args):
+    ctx = mp.get_context("spawn")
+    with ctx.Pool(1) as pool:
+        return pool.apply(evaluate, args)
+
+
+def print_comparison(kind, fp32, int8):
+    metrics = ["mAP50", "mAP50_95"] if kind == "objects" else ["accuracy"]
+    metrics += ["latency_p50_ms", "latency_p95_ms", "fps", "load_ms", "model_rss_mb", "peak_rss_mb"]
+    print(f"\n{kind}: {fp32['images']} images, {fp32['backend']} FP32 vs {int8['backend']} INT8")
+    print(f"{'metric':<18}{'FP32':>12}{'INT8':>12}{'change':>12}")
+    for metric in metrics:
+        a, b = fp32.get(metric), int8.get(metric)
+        if a is None or b is None:
+            continue
+        change = f"{(b - a) / a * 100:+.1f}%" if a else "n/a"
+        print(f"{metric:<18}{a:>12}{b:>12}{change:>12}")
+    if kind == "objects":
+        return
+    for denomination, accuracy in fp32["per_denomination"].items():
+        print(f"  ₹{denomination:<15}{accuracy:>12}{int8['per_denomination'].get(denomination, 0):>12}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare FP32 and INT8 detector accuracy and speed")
+    parser.add_argument("kind", choices=sorted(WEIGHTS), help="which detector to evaluate")
+    parser.add_argument("images", help="labelled image folder")
+    parser.add_argument("--backend", choices=["onnx", "openvino"], default="onnx",
+                        help="runtime for both variants (default: onnx)")
+    parser.add_argument("--imgsz", type=int, default=640, help="inference image size")
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args()
+
+    if not list_images(args.images):
+        print(f"No images found in {args.images}")
+        return 1
+
+    fp32 = _evaluate_isolated((args.kind, args.images, "fp32", args.backend, args.imgsz))
+    int8 = _evaluate_isolated((args.kind, args.images, "int8", args.backend, args.imgsz))
+    print_comparison(args.kind, fp32, int8)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"kind": args.kind, "fp32": fp32, "int8": int8}, f, indent=2)
+        print(f"\nReport written to {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,24 +2,106 @@ import cv2
 import sys
 import os
 import time
+import threading
+import argparse
 import numpy as np
 
 # Add the modules directory to the Python path
 sys.path.append(os.path.join(os.path.dirname(__file__), 'modules'))
 
+from utils import BootTimer
+
+# Time from launch until the assistant is listening; models are not part of it
+BOOT_BUDGET_SECONDS = 3.0
+boot_timer = BootTimer(BOOT_BUDGET_SECONDS)
+
+# These imports are cheap: every heavy engine is loaded on first use of its mode
 import ocr_reader
 import tts_engine
 import voice_command
 import object_detector
 import scene_description
+import currency_detector
+import ocr_engines
+from frame_capture import FrameCapture
+from motion_gate import MotionGate
+from document_buffer import DocumentBuffer
+from frame_quality import FrameQualityGate, guidance
+from resolution_controller import ResolutionController, DEFAULT_BUDGETS_MS, OCR_MODES, parse_budget
+from inference_worker import InferenceWorker
+from shm_pipeline import ProcessPipeline, StaleFrame
+from modules import latency_trace
+from modules.sampling_profiler import profiler
 
 # ---- Currency detection ----
-from currency_detector import detect_currency_in_frame, get_currency_guidance_text
+from currency_detector import CurrencyConsensus, get_currency_guidance_text
+
+boot_timer.mark("module imports")
+
+# Engines needed by each mode, in the order they should be pre-warmed
+MODE_ENGINES = {
+    "document": [("OCR", ocr_reader.warm_up)],
+    "navigation": [("YOLOv8", object_detector.warm_up)],
+    "scene": [("YOLOv8", scene_description.warm_up)],
+    "currency": [("currency model", currency_detector.warm_up)],
+    "objects": [("YOLOv8", object_detector.warm_up)],
+}
+
+# Model calls the mode handlers make, as (frame, seq, **options) -> result;
+# in multi-process mode the same task names are run by shm_pipeline worker
+# processes instead. Passing seq lets detectors share one pass per frame.
+ENGINE_TASKS = {
+    "objects": lambda frame, seq, **kw: object_detector.detect_objects_in_frame(frame, frame_id=seq, **kw),
+    "scene": lambda frame, seq, **kw: scene_description.describe_scene_for_blind_user(frame, frame_id=seq, **kw),
+    "currency": lambda frame, seq, **kw: currency_detector.identify_currency_scores(frame, frame_id=seq, **kw),
+    "ocr": lambda frame, seq, **kw: ocr_reader.read_text_from_frame(frame, **kw),
+    # Tracks text boxes across frames and re-reads only lines that changed
+    "document_ocr": lambda frame, seq, **kw: ocr_reader.read_document_lines(frame, **kw),
+}
+
+# What each task yields when its worker process failed or timed out
+EMPTY_RESULTS = {
+    "objects": object_detector.Detections.empty,
+    "scene": lambda: {'overall_description': ''},
+    "currency": lambda: None,
+    "ocr": lambda: "",
+    "document_ocr": list,
+}
+
+# Modes whose detector can run quantized (see compare_quantization.py)
+INT8_MODES = ("navigation", "objects", "currency")
+PROCESS_TASK_TIMEOUT = 10.0
+# A worker's first call of a task also loads its model
+PROCESS_FIRST_TASK_TIMEOUT = 60.0
 
 class BlindAssistantReader:
-    def __init__(self):
-        """Initialize the Blind Assistant Reader"""
+    def __init__(self, prewarm=True, use_processes=False, int8_modes=(), show_latency=False,
+                 motion_gate=None, resolution=None, quality_gate=None):
+        """Initialize the Blind Assistant Reader
+
+        motion_gate: a MotionGate that skips inference on unchanged frames,
+        or None to run every frame
+        resolution: a ResolutionController that sizes each mode's model input
+        to its latency budget, or None for full resolution everywhere
+        quality_gate: a FrameQualityGate that keeps blurred, badly lit and
+        text-free images away from OCR, or None to OCR everything
+        """
+        self.prewarm = prewarm
+        self.motion_gate = motion_gate
+        self.resolution = resolution
+        self.quality_gate = quality_gate
+        self.last_quality_hint = 0
+        self.quality_hint_interval = 10
+        self.show_latency = show_latency
+        self.mode_precision = {mode: "int8" for mode in int8_modes}
+        self.use_processes = use_processes
+        self.pipeline = None
+        # Tasks a worker process has already answered (its model is loaded)
+        self.pipeline_tasks_run = set()
         self.cap = None
+        self.current_frame = None
+        self.current_frame_seq = 0
+        self.current_frame_time = None
         self.is_running = False
         self.current_mode = "document"
         self.last_announcement = time.time()
@@ -29,17 +111,45 @@ class BlindAssistantReader:
         self.last_read_text = ""
         self.last_detections = []
 
-        self.document_text_buffer = []
-        self.last_stable_text = ""
-        self.text_stability_count = 0
-        self.stability_threshold = 2
+        # Lines read from the page, each spoken once after two matching reads
+        self.document = DocumentBuffer(max_lines=200, confirmations=2)
+        # This camera's currency smoothing and voting (the model may run in
+        # another process); a note is announced once, then left alone
+        self.currency_vote = CurrencyConsensus()
+        self.last_currency_hint = 0
+
+        # Mode handlers run on this worker so OCR/YOLO never block the UI loop
+        self.worker = InferenceWorker(self.process_frame, max_pending=1)
 
         self.setup_blind_voice_commands()
+        boot_timer.mark("voice command setup")
 
         tts_engine.speak_text("Blind Assistant Reader initializing. Please wait.", async_mode=False)
+        boot_timer.mark("first spoken prompt")
         print("Blind Assistant Reader initialized!")
         self.announce_available_modes()
 
+    # ---------------- Engine pre-warming ----------------
+    def prewarm_engines(self):
+        """Load every mode's engine in the background, current mode first"""
+        modes = [self.current_mode] + [m for m in MODE_ENGINES if m != self.current_mode]
+        warmed = set()
+        for mode in modes:
+            precision = self.mode_precision.get(mode)
+            for name, warm_up in MODE_ENGINES[mode]:
+                if (warm_up, precision) in warmed:
+                    continue
+                warmed.add((warm_up, precision))
+                started = time.perf_counter()
+                try:
+                    ready = warm_up(precision) if precision else warm_up()
+                except Exception as e:
+                    print(f"[startup] {name} pre-warm failed: {e}")
+                    continue
+                elapsed = (time.perf_counter() - started) * 1000
+                status = "ready" if ready else "unavailable"
+                print(f"[startup] {name} {status} after {elapsed:.0f} ms (background)")
+
     # ---------------- Voice commands ----------------
     def setup_blind_voice_commands(self):
         # Document commands
@@ -75,6 +185,9 @@ class BlindAssistantReader:
         voice_command.register_voice_command("auto read on", self.enable_auto_read)
         voice_command.register_voice_command("auto read off", self.disable_auto_read)
 
+        # Diagnostics
+        voice_command.register_voice_command("profile", self.toggle_profiler)
+
         # Help & exit
         voice_command.register_voice_command("help", self.announce_help)
         voice_command.register_voice_command("what can you do", self.announce_capabilities)
@@ -96,36 +209,44 @@ class BlindAssistantReader:
     def announce_help(self):
         help_text = ("Say 'viso' then: read document, read page, repeat, stop reading, "
                      "navigation mode, describe scene, object detection, identify money, "
-                     "speak slower, speak faster, normal speed, auto read on or off, help, or quit. "
-                     "Keyboard: SPACE to read, R to repeat, 1-5 to change modes, Q to quit.")
+                     "speak slower, speak faster, normal speed, auto read on or off, profile, help, or quit. "
+                     "Keyboard: SPACE to read, R to repeat, 1-5 to change modes, P to profile, Q to quit.")
         tts_engine.speak_text(help_text)
 
     # ---------------- Mode switching ----------------
+    def set_mode(self, mode):
+        """Change mode and cancel any inference still queued for the old one"""
+        self.current_mode = mode
+        self.worker.cancel()
+        if self.motion_gate:
+            # The new mode gets to look at the current scene at least once
+            self.motion_gate.reset()
+
     def switch_to_document(self):
-        self.current_mode = "document"
-        self.document_text_buffer.clear()
-        self.last_stable_text = ""
-        self.text_stability_count = 0
+        self.set_mode("document")
+        ocr_reader.reset_document_tracking()
+        self.document.clear()
         tts_engine.speak_text("Document reading mode. Hold your document steady in good light.")
         print("Mode: Document")
 
     def switch_to_navigation(self):
-        self.current_mode = "navigation"
+        self.set_mode("navigation")
         tts_engine.speak_text("Navigation mode. I will warn you about obstacles ahead.")
         print("Mode: Navigation")
 
     def switch_to_scene(self):
-        self.current_mode = "scene"
+        self.set_mode("scene")
         tts_engine.speak_text("Scene description mode.")
         print("Mode: Scene")
 
     def switch_to_currency(self):
-        self.current_mode = "currency"
+        self.set_mode("currency")
+        self.currency_vote.reset()
         tts_engine.speak_text("Currency identification mode.")
         print("Mode: Currency")
 
     def switch_to_objects(self):
-        self.current_mode = "objects"
+        self.set_mode("objects")
         self.last_detections = []
         tts_engine.speak_text("Object detection mode. Looking for all COCO classes.")
         print("Mode: Objects")
@@ -156,8 +277,8 @@ class BlindAssistantReader:
 
     # ---------------- Reading ----------------
     def read_full_page(self):
-        if self.document_text_buffer:
-            full_text = " ".join(self.document_text_buffer)
+        full_text = self.document.full_text()
+        if full_text:
             tts_engine.speak_text(f"Reading full page: {full_text}")
         else:
             tts_engine.speak_text("No text detected on page")
@@ -179,11 +300,19 @@ class BlindAssistantReader:
         tts_engine.speak_text("Continuing")
 
     def describe_current_scene(self):
-        if hasattr(self, 'current_frame') and self.current_frame is not None:
-            self.process_scene_description(self.current_frame, force_announce=True)
+        if self.current_frame is not None:
+            self.process_scene_description(self.current_frame, force_announce=True,
+                                           seq=self.current_frame_seq)
         else:
             tts_engine.speak_text("No image available to describe")
 
+    def toggle_profiler(self):
+        """Sample every thread for a few seconds and save the profile to logs/"""
+        if profiler.toggle(on_done=lambda paths: tts_engine.speak_text("Profile saved.")):
+            tts_engine.speak_text(f"Profiling for {profiler.duration:.0f} seconds.")
+        else:
+            tts_engine.speak_text("Stopping profiler.")
+
     def quit_application(self):
         tts_engine.speak_text("Goodbye! Thank you for using Blind Assistant Reader.")
         self.is_running = False
@@ -192,46 +321,82 @@ class BlindAssistantReader:
     # ---------------- Start camera & main loop ----------------
     def start(self):
         for cam_id in (0,1,2):
-            self.cap = cv2.VideoCapture(cam_id)
-            if self.cap.isOpened():
+            self.cap = FrameCapture(cam_id)
+            if self.cap.open():
                 break
+            self.cap.release()
         if not self.cap or not self.cap.isOpened():
             msg = "Error: Could not access camera. Please check your camera."
             print(msg)
             tts_engine.speak_text(msg)
             return
-
+        # Frames are grabbed on their own thread; the loop below always
+        # takes the newest one and never acts on a backlog of stale frames
+        self.cap.start()
+        self.worker.start()
+        boot_timer.mark("camera open")
+
+        # Models load in the background once the camera is live; in
+        # multi-process mode they live in the worker processes instead
+        if self.prewarm and not self.use_processes:
+            threading.Thread(target=self.prewarm_engines, daemon=True).start()
+
+        if self.motion_gate:
+            voice_command.register_wake_listener(lambda: self.motion_gate.wake("wake word"))
         if voice_command.start_voice_listening():
             tts_engine.speak_text("Voice commands activated. Say 'viso' followed by a command.")
         else:
             print("Voice command not available; keyboard controls active.")
             tts_engine.speak_text("Voice command not available. Use the keyboard.")
 
+        boot_timer.mark("voice listener start")
+
         self.is_running = True
         tts_engine.speak_text("Blind Assistant Reader started in document reading mode. Hold text steady.")
+        boot_timer.mark("ready")
+        print(boot_timer.report())
         print("=== Blind Assistant Reader ===")
-        print("SPACE: Manual Read   R: Repeat   1: Document   2: Navigation   3: Scene   4: Currency   5: Objects   Q: Quit")
+        print("SPACE: Manual Read   R: Repeat   1: Document   2: Navigation   3: Scene   4: Currency   5: Objects   P: Profile   Q: Quit")
 
+        capture_idle = False
         while self.is_running:
-            ret, frame = self.cap.read()
-            if not ret:
+            captured = self.cap.read()
+            if captured is None:
                 print("Error: Failed to grab frame")
                 tts_engine.speak_text("Camera error occurred")
                 break
 
+            frame = captured.image
+            self.current_frame_seq = captured.seq
+            self.current_frame_time = captured.timestamp
             self.current_frame = frame.copy()
-            self.process_frame(frame)
+            if self.use_processes:
+                self.publish_to_pipeline(captured)
+            if self.motion_gate is None or self.motion_gate.changed(frame):
+                self.worker.submit(self.current_mode, captured.seq, frame, captured_at=captured.timestamp)
+            for event in self.worker.poll_events():
+                self.handle_inference_event(event)
 
             display_frame = self.annotate_frame(frame.copy())
             cv2.imshow("Blind Assistant Reader - Visual", display_frame)
 
             key = cv2.waitKey(1) & 0xFF
+            if self.motion_gate:
+                if key != 0xFF:
+                    self.motion_gate.wake("key")
+                # Only touch the capture rate when the idle state flips
+                if self.motion_gate.idle != capture_idle:
+                    capture_idle = self.motion_gate.idle
+                    self.cap.set_frame_interval(self.motion_gate.frame_interval())
             if key == ord('q'):
                 break
             elif key == ord(' '):
-                self.manual_read_trigger(frame)
+                self.worker.submit("manual_read", captured.seq, frame, urgent=True,
+                                   captured_at=captured.timestamp)
             elif key == ord('r'):
                 self.repeat_last_reading()
+            elif key == ord('p'):
+                self.toggle_profiler()
             elif key == ord('1'):
                 self.switch_to_document()
             elif key == ord('2'):
@@ -243,43 +408,154 @@ class BlindAssistantReader:
             elif key == ord('5'):
                 self.switch_to_objects()
 
+        if self.cap.dropped:
+            print(f"Skipped {self.cap.dropped} stale frames while processing.")
+        if self.worker.dropped:
+            print(f"Dropped {self.worker.dropped} frames while inference was busy.")
+        if self.motion_gate and self.motion_gate.skipped:
+            print(f"Skipped inference on {self.motion_gate.skipped} unchanged frames.")
+        if self.currency_vote.skipped:
+            print(f"Skipped currency inference on {self.currency_vote.skipped} frames with a known note.")
+        ocr_cache = ocr_reader.ocr_reader.result_cache.stats()
+        if ocr_cache["hits"] or ocr_cache["misses"]:
+            print(f"OCR cache: {ocr_cache['hits']} hits ({ocr_cache['near_hits']} near), "
+                  f"{ocr_cache['misses']} misses, hit rate {ocr_cache['hit_rate']:.0%}")
+        if self.quality_gate and self.quality_gate.rejections:
+            reasons = ", ".join(f"{reason} {n}" for reason, n in self.quality_gate.rejections.most_common())
+            print(f"Kept {self.quality_gate.rejected} frames from OCR ({reasons}).")
+        for engine, counts in ocr_reader.ocr_reader.engines.stats.items():
+            if counts["runs"]:
+                print(f"OCR engine {engine}: {counts['wins']}/{counts['runs']} used, "
+                      f"{counts['timeouts']} timeouts, {counts['errors']} errors")
         self.cleanup()
 
+    # ---------------- Engines ----------------
+    def publish_to_pipeline(self, captured):
+        """Copy a captured frame into the shared-memory ring for the workers"""
+        if self.pipeline is None:
+            self.pipeline = ProcessPipeline(captured.image.shape)
+            self.pipeline.start()
+        self.pipeline.publish(captured.seq, captured.image, captured.timestamp)
+
+    def run_engine(self, task, frame, seq=None, roi=None, mode=None):
+        """Run a model task on ``frame`` (or its ``roi`` = (y0, y1, x0, x1)).
+
+        ``mode`` selects that mode's model precision, if one was configured,
+        and its input resolution; the call's latency is fed back to the
+        resolution controller.
+
+        In multi-process mode the task runs in a worker process on the shared
+        copy of frame ``seq``; it falls back to this process only if that
+        frame has already left the ring. If the worker fails or times out the
+        task's empty result is returned, so this process never loads a
+        second copy of the model.
+        """
+        started = time.perf_counter()
+        with latency_trace.stage(f"model.{task}"):
+            result = self._run_engine(task, frame, seq, roi, mode)
+        if self.resolution is not None and mode is not None:
+            self.resolution.record(mode, (time.perf_counter() - started) * 1000)
+        return result
+
+    def _run_engine(self, task, frame, seq, roi, mode):
+        options = {}
+        if mode in self.mode_precision:
+            options["precision"] = self.mode_precision[mode]
+        if self.resolution is not None and mode is not None:
+            if mode in OCR_MODES:
+                scale = self.resolution.ocr_scale(mode)
+                if scale < 1.0:
+                    options["scale"] = scale
+            elif self.resolution.imgsz(mode):
+                options["imgsz"] = self.resolution.imgsz(mode)
+        if self.pipeline is not None and seq is not None:
+            timeout = PROCESS_TASK_TIMEOUT if task in self.pipeline_tasks_run else PROCESS_FIRST_TASK_TIMEOUT
+            try:
+                result = self.pipeline.run(task, seq, roi=roi, timeout=timeout, **options)
+                self.pipeline_tasks_run.add(task)
+                return result
+            except StaleFrame:
+                pass
+            except Exception as e:
+                print(f"Worker process error ({task}): {e or type(e).__name__}")
+                return EMPTY_RESULTS[task]()
+        if task == "currency":
+            # In this process the cascade keeps the note position on this camera's session
+            options["session"] = self.currency_vote.session
+        if roi is not None:
+            y0, y1, x0, x1 = roi
+            return ENGINE_TASKS[task](frame[y0:y1, x0:x1], None, **options)
+        return ENGINE_TASKS[task](frame, seq, **options)
+
     # ---------------- Frame processing ----------------
-    def process_frame(self, frame):
+    def process_frame(self, mode, frame, seq=None):
+        """Run the handler for ``mode``; called on the inference worker thread"""
         now = time.time()
         try:
-            if self.current_mode == "document":
-                self.process_document_reading(frame)
-            elif self.current_mode == "navigation":
-                self.process_navigation_assistance(frame, now)
-            elif self.current_mode == "scene":
-                self.process_scene_description(frame, now)
-            elif self.current_mode == "currency":
-                self.process_currency_identification(frame, now)
-            elif self.current_mode == "objects":
-                self.process_object_detection(frame, now)
+            if mode == "document":
+                return self.process_document_reading(frame, seq)
+            elif mode == "navigation":
+                return self.process_navigation_assistance(frame, now, seq)
+            elif mode == "scene":
+                return self.process_scene_description(frame, now, seq=seq)
+            elif mode == "currency":
+                return self.process_currency_identification(frame, now, seq)
+            elif mode == "objects":
+                return self.process_object_detection(frame, now, seq)
+            elif mode == "manual_read":
+                return self.manual_read_trigger(frame, seq)
         except Exception as e:
             print(f"Processing error: {e}")
 
+    def handle_inference_event(self, event):
+        """Apply a finished inference result on the UI thread"""
+        if event.kind == "error":
+            print(f"Processing error in {event.mode} mode: {event.result}")
+        elif event.mode == "objects" and event.mode == self.current_mode:
+            self.last_detections = event.result or []
+
+    def speak_result(self, text):
+        """Speak a handler's output unless its mode was switched away meanwhile"""
+        if self.worker.is_cancelled():
+            return False
+        tts_engine.speak_text(text)
+        return True
+
     # ---------------- Document Reading ----------------
-    def process_document_reading(self, frame):
+    def check_ocr_quality(self, image, hint=False):
+        """True if ``image`` is worth OCR; otherwise optionally speak why not"""
+        if self.quality_gate is None:
+            return True
+        report = self.quality_gate.check(image)
+        if report['ok']:
+            return True
+        now = time.time()
+        if hint and now - self.last_quality_hint >= self.quality_hint_interval:
+            self.last_quality_hint = now
+            self.speak_result(guidance(report))
+        return False
+
+    def process_document_reading(self, frame, seq=None):
         h, w = frame.shape[:2]
-        roi = frame[int(h*0.2):int(h*0.8), int(w*0.1):int(w*0.9)]
-        cv2.rectangle(frame, (int(w*0.1), int(h*0.2)), (int(w*0.9), int(h*0.8)), (0,255,0), 2)
-        text = ocr_reader.read_text(roi)
-        if text.strip():
+        roi = (int(h*0.2), int(h*0.8), int(w*0.1), int(w*0.9))
+        if not self.check_ocr_quality(frame[roi[0]:roi[1], roi[2]:roi[3]], hint=self.auto_read):
+            return
+        lines = self.run_engine("document_ocr", frame, seq, roi, mode="document")
+        if not lines or self.worker.is_cancelled():
+            return
+        new_lines = self.document.observe(lines)
+        if new_lines:
+            text = " ".join(new_lines)
             self.last_read_text = text
-            self.document_text_buffer.append(text)
             if self.auto_read:
-                tts_engine.speak_text(text)
+                self.speak_result(text)
 
     # ---------------- Navigation ----------------
-    def process_navigation_assistance(self, frame, now):
+    def process_navigation_assistance(self, frame, now, seq=None):
         if now - self.last_announcement < self.announcement_interval * 1.5:
             return
 
-        detections = object_detector.detect_objects_in_frame(frame)
+        detections = self.run_engine("objects", frame, seq, mode="navigation")
         obstacle_labels = {
             "person","bicycle","car","motorbike","bus","truck","train","bench",
             "chair","sofa","pottedplant","diningtable","tvmonitor","bird","cat","dog",
@@ -289,8 +565,7 @@ class BlindAssistantReader:
         announced = False
         if detections:
             H, W = frame.shape[:2]
-            obstacles = [d for d in detections if d["label"] in obstacle_labels]
-            obstacles = sorted(obstacles, key=lambda d: d['box'][2]*d['box'][3], reverse=True)[:5]
+            obstacles = detections.with_labels(obstacle_labels).largest(5)
 
             for d in obstacles:
                 x, y, w, h = d['box']
@@ -306,7 +581,8 @@ class BlindAssistantReader:
 
                 msg = f"{d['label']} {direction}, {dist}"
                 print(f"Navigation: {msg}")
-                tts_engine.speak_text(msg)
+                if not self.speak_result(msg):
+                    break
                 time.sleep(0.3)
 
             self.last_announcement = now
@@ -326,47 +602,58 @@ class BlindAssistantReader:
                 elif center_x > frame_center + 60: pos = "on your right"
                 msg = f"Obstacle {pos}."
                 print(f"Navigation: {msg}")
-                tts_engine.speak_text(msg)
+                self.speak_result(msg)
                 self.last_announcement = now
 
     # ---------------- Scene Description ----------------
-    def process_scene_description(self, frame, now=None, force_announce=False):
-        scene = scene_description.describe_scene_for_blind_user(frame)
+    def process_scene_description(self, frame, now=None, force_announce=False, seq=None):
+        scene = self.run_engine("scene", frame, seq, mode="scene")
         description = scene.get('overall_description', '')
         if description:
             print(f"Scene: {description}")
-            tts_engine.speak_text(description)
+            self.speak_result(description)
             if now:
                 self.last_announcement = now
 
     # ---------------- Currency ----------------
-    def process_currency_identification(self, frame, now):
-        results = detect_currency_in_frame(frame)
-        guidance = get_currency_guidance_text(results)
-        if guidance:
+    def process_currency_identification(self, frame, now, seq=None):
+        if not self.currency_vote.needs_inference(frame):
+            return
+        scores = self.run_engine("currency", frame, seq, mode="currency")
+        results, announce = self.currency_vote.update(frame, scores)
+        if announce:
+            guidance = get_currency_guidance_text(results)
             print(f"Currency: {guidance}")
-            tts_engine.speak_text(guidance)
+            self.speak_result(guidance)
             self.last_announcement = now
+        elif not results["currency_detected"] and now - self.last_currency_hint >= self.quality_hint_interval:
+            # Holding-the-note hint, not repeated on every empty frame
+            self.last_currency_hint = now
+            self.speak_result(get_currency_guidance_text(results))
 
     # ---------------- Objects ----------------
-    def process_object_detection(self, frame, now=None):
-        detections = object_detector.detect_objects_in_frame(frame)
-        self.last_detections = detections
+    def process_object_detection(self, frame, now=None, seq=None):
+        detections = self.run_engine("objects", frame, seq, mode="objects")
         if detections:
             labels = [d['label'] for d in detections[:3]]
             msg = "Detected: " + ", ".join(labels)
             print(f"Objects: {msg}")
-            tts_engine.speak_text(msg)
+            self.speak_result(msg)
             if now:
                 self.last_announcement = now
+        return detections
 
     # ---------------- Manual read ----------------
-    def manual_read_trigger(self, frame):
-        text = ocr_reader.read_text(frame)
+    def manual_read_trigger(self, frame, seq=None):
+        if not self.check_ocr_quality(frame, hint=True):
+            print(f"Manual Read skipped: {', '.join(self.quality_gate.last_report['reasons'])}")
+            return ""
+        text = self.run_engine("ocr", frame, seq)
         if text.strip():
             print(f"Manual Read: {text}")
-            tts_engine.speak_text(text)
+            self.speak_result(text)
             self.last_read_text = text
+        return text
 
     # ---------------- Annotate frame ----------------
     def annotate_frame(self, frame):
@@ -374,25 +661,94 @@ class BlindAssistantReader:
         status = "AUTO READ ON" if self.auto_read else "AUTO READ OFF"
         cv2.putText(frame, status, (10,70), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255,255,0),2)
         cv2.putText(frame, f"Speed: {self.reading_speed.upper()}", (10,110), cv2.FONT_HERSHEY_SIMPLEX,0.7,(255,255,0),2)
+        if self.motion_gate and self.motion_gate.idle:
+            cv2.putText(frame, "IDLE - move or press a key", (10,150), cv2.FONT_HERSHEY_SIMPLEX,0.7,(0,165,255),2)
         instructions = "SPACE: Read  R: Repeat  1:Doc 2:Nav 3:Scene 4:Currency 5:Objects  Q:Quit"
         cv2.putText(frame, instructions, (10,frame.shape[0]-20), cv2.FONT_HERSHEY_SIMPLEX,0.55,(255,255,255),1)
-        if self.current_mode == "objects":
+        if self.current_mode == "document":
+            h, w = frame.shape[:2]
+            report = self.quality_gate.last_report if self.quality_gate else None
+            color = (0,255,0) if report is None or report['ok'] else (0,0,255)
+            cv2.rectangle(frame, (int(w*0.1), int(h*0.2)), (int(w*0.9), int(h*0.8)), color, 2)
+            if report is not None and not report['ok']:
+                cv2.putText(frame, "Not read: " + ", ".join(report['reasons']), (10,190),
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0,0,255), 2)
+        elif self.current_mode == "objects":
             object_detector.draw_detections(frame, self.last_detections)
+        if self.show_latency:
+            # p50/p95 per stage, right-aligned in the top corner
+            lines = latency_trace.latency_stats.overlay_lines()
+            if self.resolution is not None and self.current_mode in self.resolution.budgets:
+                lines.append(self.resolution.describe(self.current_mode))
+            for i, line in enumerate(lines):
+                (tw, _), _ = cv2.getTextSize(line, cv2.FONT_HERSHEY_SIMPLEX, 0.5, 1)
+                cv2.putText(frame, line, (frame.shape[1]-tw-10, 25+i*22), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0,255,255), 1)
         return frame
 
     # ---------------- Cleanup ----------------
     def cleanup(self):
         print("Cleaning up...")
+        self.worker.stop()
+        latency_trace.latency_stats.log_summary()
         try: voice_command.stop_voice_listening()
         except: pass
         try: tts_engine.stop_speaking()
         except: pass
         if self.cap: self.cap.release()
+        if self.pipeline: self.pipeline.close()
         cv2.destroyAllWindows()
         print("Blind Assistant Reader stopped.")
 
 def main():
-    assistant = BlindAssistantReader()
+    parser = argparse.ArgumentParser(description="Blind Assistant Reader")
+    parser.add_argument("--multiprocess", action="store_true",
+                        help="run detection and OCR in worker processes fed through shared memory")
+    parser.add_argument("--no-prewarm", action="store_true",
+                        help="load each model only when its mode is first used")
+    parser.add_argument("--int8", nargs="+", default=[], choices=INT8_MODES, metavar="MODE",
+                        help=f"run these modes' detectors INT8-quantized ({', '.join(INT8_MODES)})")
+    parser.add_argument("--profile-seconds", type=float, default=profiler.duration,
+                        help="length of a profiling run started with P or 'viso profile'")
+    parser.add_argument("--no-motion-gate", action="store_true",
+                        help="run inference on every frame, even when nothing changed")
+    parser.add_argument("--motion-threshold", type=float, default=4.0,
+                        help="mean gray-level change that counts as motion (default: 4)")
+    parser.add_argument("--idle-after", type=float, default=60.0,
+                        help="seconds without change or input before dropping to idle; 0 disables")
+    parser.add_argument("--idle-fps", type=float, default=2.0, help="frame rate while idle")
+    parser.add_argument("--show-latency", action="store_true",
+                        help="draw per-stage latency percentiles on the preview window")
+    parser.add_argument("--latency-budget", action="append", default=[], type=parse_budget,
+                        metavar="MODE=MS",
+                        help="model latency budget for a mode, e.g. navigation=150 (defaults: "
+                             + ", ".join(f"{m}={ms}" for m, ms in DEFAULT_BUDGETS_MS.items()) + ")")
+    parser.add_argument("--fixed-resolution", action="store_true",
+                        help="always run models at full resolution instead of fitting the budgets")
+    parser.add_argument("--no-quality-gate", action="store_true",
+                        help="OCR every frame, even blurred, badly lit or text-free ones")
+    parser.add_argument("--ocr-policy", choices=ocr_engines.POLICIES, default=None,
+                        help="run EasyOCR and Tesseract together and take the first text (default, "
+                             "or $VISO_OCR_POLICY) or merge both word by word")
+    args = parser.parse_args()
+    profiler.duration = args.profile_seconds
+    if args.ocr_policy:
+        ocr_reader.ocr_reader.engines.policy = args.ocr_policy
+        # Inherited by the spawned worker processes
+        os.environ["VISO_OCR_POLICY"] = args.ocr_policy
+
+    motion_gate = None
+    if not args.no_motion_gate:
+        motion_gate = MotionGate(threshold=args.motion_threshold, idle_after=args.idle_after,
+                                 idle_fps=args.idle_fps)
+
+    resolution = None
+    if not args.fixed_resolution:
+        resolution = ResolutionController(budgets=dict(args.latency_budget))
+
+    assistant = BlindAssistantReader(prewarm=not args.no_prewarm, use_processes=args.multiprocess,
+                                     int8_modes=args.int8, show_latency=args.show_latency,
+                                     motion_gate=motion_gate, resolution=resolution,
+                                     quality_gate=None if args.no_quality_gate else FrameQualityGate())
     assistant.start()
 
 if __name__ == "__main__":
@@ -11,6 +11,7 @@ import ocr_reader
 import tts_engine
 import voice_command
 import object_detector
+from motion_gate import MotionGate
 
 class VisoSonicAssistant:
     def __init__(self):
@@ -19,6 +20,8 @@ class VisoSonicAssistant:
         self.is_running = False
         self.current_mode = "ocr"  # ocr, object, color, voice
         self.background_frame = None
+        # Frames are only processed when they differ from the last processed one
+        self.motion_gate = MotionGate()
         self.last_announcement = time.time()
         self.announcement_interval = 3  # seconds
         
@@ -42,18 +45,21 @@ class VisoSonicAssistant:
     def switch_to_ocr(self):
         """Switch to OCR mode"""
         self.current_mode = "ocr"
+        self.motion_gate.reset()
         tts_engine.speak_text("Switching to text reading mode")
         print("Mode: OCR Text Reading")
     
     def switch_to_objects(self):
         """Switch to object detection mode"""
         self.current_mode = "object"
+        self.motion_gate.reset()
         tts_engine.speak_text("Switching to object detection mode")
         print("Mode: Object Detection")
     
     def switch_to_colors(self):
         """Switch to color detection mode"""
         self.current_mode = "color"
+        self.motion_gate.reset()
         tts_engine.speak_text("Switching to color detection mode")
         print("Mode: Color Detection")
     
@@ -81,7 +87,8 @@ class VisoSonicAssistant:
             tts_engine.speak_text(error_msg)
             return
         
-        # Start voice command listening
+        # Start voice command listening; the wake word also ends the idle state
+        voice_command.register_wake_listener(lambda: self.motion_gate.wake("wake word"))
         if voice_command.start_voice_listening():
             tts_engine.speak_text("Voice commands activated. Say 'viso' followed by a command.")
         
@@ -98,6 +105,8 @@ class VisoSonicAssistant:
         
         # Capture background frame for motion detection
         ret, self.background_frame = self.cap.read()
+        if ret:
+            self.motion_gate.prime(self.background_frame)
         
         # Main processing loop
         while self.is_running:
@@ -106,15 +115,19 @@ class VisoSonicAssistant:
                 print("Error: Failed to grab frame")
                 break
             
-            # Process frame based on current mode
-            self.process_frame(frame)
+            # Process frame based on current mode, skipping unchanged scenes
+            if self.motion_gate.changed(frame):
+                self.process_frame(frame)
             
             # Display frame with annotations
             display_frame = self.annotate_frame(frame.copy())
             cv2.imshow("Viso-Sonic Assistant", display_frame)
             
-            # Handle keyboard input
-            key = cv2.waitKey(1) & 0xFF
+            # Handle keyboard input; while idle the loop slows to the idle frame rate
+            delay = int(self.motion_gate.frame_interval() * 1000) or 1
+            key = cv2.waitKey(delay) & 0xFF
+            if key != 0xFF:
+                self.motion_gate.wake("key")
             if key == ord('q'):
                 break
             elif key == ord('1'):
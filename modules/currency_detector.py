@@ -1,63 +1,434 @@
+import json
 import os
+import threading
+import time
 import cv2
 import numpy as np
-from ultralytics import YOLO
+from modules import model_registry
+from modules.motion_gate import MotionGate
+from modules.resolution_controller import IMGSZ_STEPS
 
-# Path to your YOLOv8 model
-MODEL_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'models', 'best.pt')
-if not os.path.exists(MODEL_PATH):
-    raise FileNotFoundError(f"YOLOv8 model not found at: {MODEL_PATH}")
+# "torch", "onnx" or "openvino"; None uses model_registry.DEFAULT_BACKEND
+BACKEND = model_registry.env_choice("VISO_CURRENCY_BACKEND", model_registry.BACKENDS)
+# "fp32" or "int8"; None uses model_registry.DEFAULT_PRECISION
+PRECISION = model_registry.env_choice("VISO_CURRENCY_PRECISION", model_registry.PRECISIONS)
 
-# Load YOLO model
-model = YOLO(MODEL_PATH)
+# Your YOLOv8 model (loaded on first use through the model registry)
+MODEL_NAME = 'best.pt'
+# Optional Keras denomination classifier for the cropped note; only used
+# next to a sidecar describing it, e.g.
+#   {"labels": ["0", "10", ...], "channels": "rgb", "scale": 255.0}
+# where labels are the class of each output in order, channels the order
+# the model expects and scale what pixel values are divided by
+CLASSIFIER_NAME = 'currency_model.h5'
+CLASSIFIER_META = 'currency_model.json'
+# "0" runs best.pt on the whole frame instead of the locate-then-classify cascade
+USE_CASCADE = os.environ.get("VISO_CURRENCY_CASCADE", "1") != "0"
+_model_keys = {None: model_registry.acquire_model(MODEL_NAME, BACKEND, PRECISION)}
+_model_keys_lock = threading.Lock()
+
+def _model_key(precision=None):
+    with _model_keys_lock:
+        key = _model_keys.get(precision)
+        if key is None:
+            key = _model_keys[precision] = model_registry.acquire_model(MODEL_NAME, BACKEND, precision)
+        return key
+
+def _get_model(precision=None):
+    return model_registry.get_model(_model_key(precision))
+
+def warm_up(precision=None):
+    """Load the currency model ahead of the first frame"""
+    return _get_model(precision) is not None
 
 # Class mapping (matches your YAML exactly)
 CURRENCY_CLASSES = ["0", "10", "100", "20", "200", "5", "50", "500"]
 
-# Prediction history for smoothing
-prediction_history = []
+# Frames averaged for smoothing
 MAX_HISTORY = 5
 
 # Confidence threshold
 CONF_THRESHOLD = 0.5
+# Smoothed score above which a denomination is reported
+DETECTION_THRESHOLD = 0.55
 
-def detect_currency_in_frame(frame):
-    global prediction_history
+NOT_DETECTED = {
+    "currency_detected": False,
+    "denomination": None,
+    "confidence": 0.0
+}
 
-    # Run YOLO prediction
-    results = model.predict(frame, verbose=False)[0]
+class CurrencySession:
+    """Smoothing state for one camera or stream.
+
+    The last ``history`` frames' scores sit in a preallocated ring next to
+    their running sum, so each update costs the same however long the
+    window is, and separate sessions never mix their frames. The session
+    also remembers where the cascade last found the note in this stream.
+    """
+
+    def __init__(self, history=MAX_HISTORY):
+        self.history = history
+        self._ring = np.zeros((history, len(CURRENCY_CLASSES)), dtype=np.float64)
+        self._sum = np.zeros(len(CURRENCY_CLASSES), dtype=np.float64)
+        self._count = 0
+        self._next = 0
+        self._lock = threading.Lock()
+        self._note = None
+
+    def reset(self):
+        with self._lock:
+            self._ring[:] = 0
+            self._sum[:] = 0
+            self._count = 0
+            self._next = 0
+            self._note = None
+
+    @property
+    def note(self):
+        """(box, crop signature) of the last note the cascade found, or None"""
+        with self._lock:
+            return self._note
+
+    @note.setter
+    def note(self, value):
+        with self._lock:
+            self._note = value
+
+    def update(self, counts):
+        """Add one frame's denomination scores and return the smoothed decision"""
+        with self._lock:
+            self._sum -= self._ring[self._next]
+            self._ring[self._next] = counts
+            self._sum += self._ring[self._next]
+            self._next = (self._next + 1) % self.history
+            self._count = min(self._count + 1, self.history)
+            avg_preds = self._sum / self._count
+
+        class_idx = int(np.argmax(avg_preds))
+        confidence = float(avg_preds[class_idx])
+        detected = confidence > DETECTION_THRESHOLD
+
+        return {
+            "currency_detected": detected,
+            "denomination": CURRENCY_CLASSES[class_idx] if detected else None,
+            "confidence": confidence
+        }
+
+# Used by callers that do not pass their own session
+default_session = CurrencySession()
+
+class CurrencyConsensus:
+    """Announce a note once, then stop running the model until it moves.
+
+    A denomination is accepted after its smoothed confidence has stayed at
+    or above ``min_confidence`` for ``frames`` frames in a row. From then on
+    ``needs_inference`` only compares a small thumbnail of each frame with
+    the accepted one, and inference resumes when the view changed (note
+    removed, swapped or moved). The same note is not announced again until
+    it has been gone for ``absent_frames`` frames or ``repeat_after``
+    seconds have passed.
+    """
+
+    def __init__(self, session=None, min_confidence=0.7, frames=4, change_threshold=10.0,
+                 absent_frames=3, repeat_after=30.0):
+        self.session = session or CurrencySession()
+        self.min_confidence = min_confidence
+        self.frames = frames
+        self.absent_frames = absent_frames
+        self.repeat_after = repeat_after
+        self.inferred = 0
+        self.skipped = 0
+        self._gate = MotionGate(threshold=change_threshold, idle_after=0)
+        self.reset()
+
+    def reset(self):
+        """Start over, e.g. when currency mode is entered"""
+        self.session.reset()
+        self.locked = None
+        self._streak_denomination = None
+        self._streak = 0
+        self._absent = 0
+        self._announced = None
+        self._announced_at = 0.0
+
+    def needs_inference(self, frame):
+        """False while an accepted note is still in view unchanged"""
+        if self.locked is not None:
+            if self._gate.difference(frame) <= self._gate.threshold:
+                self.skipped += 1
+                return False
+            # Something changed: verify from scratch without stale history
+            self.locked = None
+            self.session.reset()
+        self.inferred += 1
+        return True
+
+    def update(self, frame, scores):
+        """Feed one frame's scores (None if no model); returns (result, announce)"""
+        result = dict(NOT_DETECTED) if scores is None else self.session.update(scores)
+        denomination = result["denomination"]
+        # The frame itself must agree, not just the history it is averaged with
+        agrees = (denomination is not None and scores is not None and np.any(scores)
+                  and CURRENCY_CLASSES[int(np.argmax(scores))] == denomination)
+
+        if not agrees or result["confidence"] < self.min_confidence:
+            self._streak_denomination, self._streak = None, 0
+            if scores is None or not np.any(scores):
+                self._absent += 1
+                if self._absent >= self.absent_frames:
+                    # Note taken away: forget it, so the next one starts fresh
+                    self._announced = None
+                    self.session.reset()
+            return result, False
+
+        self._absent = 0
+        if denomination == self._streak_denomination:
+            self._streak += 1
+        else:
+            self._streak_denomination, self._streak = denomination, 1
+        if self._streak < self.frames:
+            return result, False
 
-    # Initialize empty counts
-    counts = np.zeros(len(CURRENCY_CLASSES), dtype=np.float32)
+        self.locked = denomination
+        self._gate.prime(frame)
+        now = time.time()
+        announce = denomination != self._announced or now - self._announced_at >= self.repeat_after
+        if announce:
+            self._announced, self._announced_at = denomination, now
+        return result, announce
 
-    # Aggregate results
-    for box in results.boxes:
-        cls = int(box.cls)
-        conf = float(box.conf)
-        if conf >= CONF_THRESHOLD:
-            counts[cls] += conf
+def denomination_scores(results):
+    """Per-class share of box confidence for one frame's YOLO results"""
+    # Sum confidences per class over all boxes at once
+    data = results.boxes.data.cpu().numpy()  # x1, y1, x2, y2, conf, cls per row
+    conf = data[:, -2]
+    cls = data[:, -1].astype(np.int64)
+    keep = conf >= CONF_THRESHOLD
+    counts = np.bincount(cls[keep], weights=conf[keep], minlength=len(CURRENCY_CLASSES))
+    counts = counts[:len(CURRENCY_CLASSES)].astype(np.float32)
 
     # Normalize counts to sum=1 (like probability)
     if counts.sum() > 0:
         counts /= counts.sum()
+    return counts
+
+def currency_scores_in_frame(frame, frame_id=None, precision=None, imgsz=None):
+    """Unsmoothed denomination_scores for one frame, or None without a model"""
+    model_key = _model_key(precision)
+    if model_registry.get_model(model_key) is None:
+        return None
+
+    # Run YOLO prediction
+    options = {}
+    if imgsz and model_registry.accepts_imgsz(model_key):
+        options["imgsz"] = imgsz
+    results = model_registry.predict(model_key, frame, frame_id, verbose=False, **options)[0]
+    return denomination_scores(results)
+
+def detect_currency_in_frame(frame, frame_id=None, precision=None, imgsz=None, session=None):
+    """Smoothed currency decision; ``session`` keeps one stream's history
+    (default_session if None)"""
+    scores = identify_currency_scores(frame, frame_id, precision, imgsz, session)
+    if scores is None:
+        return dict(NOT_DETECTED)
+    return smooth_prediction(scores, session)
+
+def currency_scores_in_frames(frames, frame_ids=None, precision=None):
+    """Unsmoothed denomination_scores for each frame, from one batched YOLO call.
+
+    Returns None if the model is unavailable. Feed the scores through
+    smooth_prediction() in frame order to get detect_currency_in_frame results.
+    """
+    model_key = _model_key(precision)
+    if model_registry.get_model(model_key) is None:
+        return None
+    batch = model_registry.predict_batch(model_key, frames, frame_ids, verbose=False)
+    return [denomination_scores(results[0]) for results in batch]
+
+# ---------------- Locate-then-classify cascade ----------------
+# The note is found on a small letterboxed copy of the frame...
+LOCALIZER_IMGSZ = 320
+LOCALIZER_CONF = 0.25
+# ...and classified on a crop of the full-resolution frame. Both sizes are
+# ceilings, scaled down with the caller's imgsz (e.g. the resolution
+# controller's) relative to the largest imgsz step
+CLASSIFIER_IMGSZ = 320
+CROP_MARGIN = 0.1
+# Mean gray-level change of the crop thumbnail that counts as a different note
+CROP_CHANGE_THRESHOLD = 8.0
+
+def _stage_imgsz(imgsz, ceiling):
+    """Input size of a cascade stage whose size at full resolution is ``ceiling``"""
+    if not imgsz:
+        return ceiling
+    scaled = ceiling * min(imgsz, IMGSZ_STEPS[-1]) / IMGSZ_STEPS[-1]
+    # Kept a multiple of the 32 px stride
+    return max(32, int(round(scaled / 32)) * 32)
+
+def _load_classifier_meta():
+    """(output index of each CURRENCY_CLASSES entry, "rgb"/"bgr", scale) from
+    the classifier's sidecar, or None if it is missing or does not fit"""
+    path = model_registry.resolve_model_path(CLASSIFIER_META)
+    if not os.path.isfile(path):
+        print(f"[currency] {CLASSIFIER_NAME} has no {CLASSIFIER_META} with its labels and "
+              "preprocessing; classifying crops with the detector")
+        return None
+    try:
+        with open(path) as f:
+            meta = json.load(f)
+        labels = [str(label) for label in meta["labels"]]
+        channels = str(meta.get("channels", "rgb")).lower()
+        scale = float(meta.get("scale", 255.0))
+    except (OSError, ValueError, TypeError, KeyError) as e:
+        print(f"[currency] Cannot read {CLASSIFIER_META}: {e}; classifying crops with the detector")
+        return None
+    if sorted(labels) != sorted(CURRENCY_CLASSES) or channels not in ("rgb", "bgr") or scale <= 0:
+        print(f"[currency] {CLASSIFIER_META} does not match the denominations "
+              f"{', '.join(CURRENCY_CLASSES)}; classifying crops with the detector")
+        return None
+    return [labels.index(c) for c in CURRENCY_CLASSES], channels, scale
+
+def _load_keras_classifier():
+    """(Keras model, sidecar meta) for currency_model.h5, or None if it cannot be used here"""
+    path = model_registry.resolve_model_path(CLASSIFIER_NAME)
+    if not os.path.isfile(path):
+        return None
+    meta = _load_classifier_meta()
+    if meta is None:
+        return None
+    with open(path, "rb") as f:
+        if f.read(40).startswith(b"version https://git-lfs"):
+            print(f"[currency] {CLASSIFIER_NAME} is a Git LFS pointer (run 'git lfs pull'); "
+                  "classifying crops with the detector")
+            return None
+    try:
+        from tensorflow import keras
+        model = keras.models.load_model(path, compile=False)
+    except Exception as e:
+        print(f"[currency] Keras classifier unavailable: {e}")
+        return None
+    if model.output_shape[-1] != len(CURRENCY_CLASSES):
+        print(f"[currency] {CLASSIFIER_NAME} has {model.output_shape[-1]} outputs, "
+              f"expected {len(CURRENCY_CLASSES)}; classifying crops with the detector")
+        return None
+    print(f"[currency] classifying crops with {CLASSIFIER_NAME}")
+    return model, meta
+
+class CurrencyCascade:
+    """Find the note at low resolution, classify only its full-resolution crop.
+
+    The classifier is currency_model.h5 when Keras can load it and its
+    sidecar gives its labels and preprocessing, otherwise best.pt run on
+    the crop, where the note fills the input. While the crop at the note
+    position the session remembers still looks the same, the note is not
+    searched for again, but the crop is always classified afresh so every
+    frame's scores are a real vote. The cascade itself holds no per-stream
+    state and can be shared by sessions.
+    """
+
+    def __init__(self):
+        self.localized = 0
+        self.classified = 0
+        self.reused = 0
+        self._classifier = None
+        self._classifier_loaded = False
+        self._lock = threading.Lock()
+
+    def _crop_signature(self, frame, box):
+        x0, y0, x1, y1 = box
+        crop = frame[y0:y1, x0:x1]
+        gray = crop if crop.ndim == 2 else cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY)
+        return cv2.resize(gray, (32, 16), interpolation=cv2.INTER_AREA).astype(np.int16)
+
+    def _localize(self, model_key, frame, frame_id, imgsz):
+        """Full-frame (x0, y0, x1, y1) of the most confident note, or None"""
+        options = {}
+        if model_registry.accepts_imgsz(model_key):
+            options["imgsz"] = _stage_imgsz(imgsz, LOCALIZER_IMGSZ)
+        results = model_registry.predict(model_key, frame, frame_id, conf=LOCALIZER_CONF,
+                                         verbose=False, **options)[0]
+        data = results.boxes.data.cpu().numpy()
+        if not len(data):
+            return None
+        x0, y0, x1, y1 = data[int(np.argmax(data[:, -2])), :4]
+        mx, my = (x1 - x0) * CROP_MARGIN, (y1 - y0) * CROP_MARGIN
+        h, w = frame.shape[:2]
+        box = (int(max(0, x0 - mx)), int(max(0, y0 - my)), int(min(w, x1 + mx)), int(min(h, y1 + my)))
+        if box[2] - box[0] < 8 or box[3] - box[1] < 8:
+            return None
+        return box
+
+    def _classify(self, model_key, crop, imgsz):
+        with self._lock:
+            if not self._classifier_loaded:
+                self._classifier = _load_keras_classifier()
+                self._classifier_loaded = True
+            if self._classifier is not None:
+                model, (order, channels, scale) = self._classifier
+                _, height, width, _ = model.input_shape
+                image = cv2.resize(crop, (width, height), interpolation=cv2.INTER_AREA)
+                if channels == "rgb":
+                    image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+                probs = model.predict(image[None].astype(np.float32) / scale, verbose=0)[0]
+                # Reordered from the model's outputs to CURRENCY_CLASSES
+                return np.asarray(probs, dtype=np.float32)[order]
+        options = {}
+        if model_registry.accepts_imgsz(model_key):
+            options["imgsz"] = _stage_imgsz(imgsz, CLASSIFIER_IMGSZ)
+        results = model_registry.predict(model_key, crop, None, verbose=False, **options)[0]
+        return denomination_scores(results)
+
+    def scores(self, frame, session, frame_id=None, precision=None, imgsz=None):
+        """denomination_scores-style scores for the note in ``frame``; None without a model.
+
+        ``session`` remembers the note position between this stream's frames.
+        """
+        model_key = _model_key(precision)
+        if model_registry.get_model(model_key) is None:
+            return None
+
+        box = None
+        note = session.note
+        if note is not None:
+            signature = self._crop_signature(frame, note[0])
+            if float(np.mean(np.abs(signature - note[1]))) <= CROP_CHANGE_THRESHOLD:
+                box = note[0]
+        if box is None:
+            box = self._localize(model_key, frame, frame_id, imgsz)
+            if box is None:
+                session.note = None
+                self._count("localized")
+                return np.zeros(len(CURRENCY_CLASSES), dtype=np.float32)
+            session.note = (box, self._crop_signature(frame, box))
+            self._count("localized")
+        else:
+            self._count("reused")
+
+        x0, y0, x1, y1 = box
+        scores = self._classify(model_key, frame[y0:y1, x0:x1], imgsz)
+        self._count("classified")
+        return scores
+
+    def _count(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
 
-    # Add to history for smoothing
-    prediction_history.append(counts)
-    if len(prediction_history) > MAX_HISTORY:
-        prediction_history.pop(0)
+# Shared by every session; the note positions live on the sessions
+default_cascade = CurrencyCascade()
 
-    avg_preds = np.mean(prediction_history, axis=0)
-    class_idx = int(np.argmax(avg_preds))
-    confidence = float(np.max(avg_preds))
+def identify_currency_scores(frame, frame_id=None, precision=None, imgsz=None, session=None):
+    """Unsmoothed scores for one camera frame, through the cascade unless disabled.
 
-    detected = confidence > 0.55
-    denomination = CURRENCY_CLASSES[class_idx] if detected else None
+    ``session`` is the stream the frame belongs to (default_session if None).
+    """
+    if USE_CASCADE:
+        return default_cascade.scores(frame, session or default_session, frame_id, precision, imgsz)
+    return currency_scores_in_frame(frame, frame_id, precision, imgsz)
 
-    return {
-        "currency_detected": detected,
-        "denomination": denomination,
-        "confidence": confidence
-    }
+def smooth_prediction(counts, session=None):
+    """Add one frame's denomination scores to ``session``'s history and decide"""
+    return (session or default_session).update(counts)
 
 def get_currency_guidance_text(result):
     if result["currency_detected"]:
@@ -67,12 +438,11 @@ def get_currency_guidance_text(result):
 
 # Optional: visualize detections (for debugging)
 def draw_currency_boxes(frame, results):
-    for box in results.boxes:
-        cls = int(box.cls)
-        conf = float(box.conf)
-        if conf >= CONF_THRESHOLD:
-            x1, y1, x2, y2 = map(int, box.xyxy[0])
-            label = f"{CURRENCY_CLASSES[cls]} ₹ {conf:.2f}"
-            cv2.rectangle(frame, (x1, y1), (x2, y2), (0,255,0), 2)
-            cv2.putText(frame, label, (x1, y1-10), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0,255,0), 2)
+    data = results.boxes.data.cpu().numpy()
+    for row in data[data[:, -2] >= CONF_THRESHOLD].tolist():
+        x1, y1, x2, y2 = map(int, row[:4])
+        conf, cls = row[-2], int(row[-1])
+        label = f"{CURRENCY_CLASSES[cls]} ₹ {conf:.2f}"
+        cv2.rectangle(frame, (x1, y1), (x2, y2), (0,255,0), 2)
+        cv2.putText(frame, label, (x1, y1-10), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0,255,0), 2)
     return frame
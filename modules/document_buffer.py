@@ -0,0 +1,140 @@
+"""
+Line buffer for document reading
+
+OCR of a page held in front of the camera returns nearly the same lines on
+every frame, with small recognition differences between them. Each incoming
+line is matched against the lines already seen (``difflib`` similarity), so
+variants of one printed line count as repeated observations of it instead of
+new text. A line is confirmed, and reported once, after it has been observed
+``confirmations`` times. The buffer holds at most ``max_lines`` lines, so
+memory stays fixed however long a document session runs.
+"""
+
+import difflib
+import threading
+from collections import Counter
+
+from modules.utils import clean_text
+
+# Spelling variants kept per line to pick the most frequently read one
+MAX_VARIANTS = 4
+
+
+class _Line:
+    __slots__ = ("variants", "seen", "confirmed", "last_seen")
+
+    def __init__(self, text, observation):
+        self.variants = Counter({text: 1})
+        self.seen = 1
+        self.confirmed = False
+        self.last_seen = observation
+
+    @property
+    def text(self):
+        return self.variants.most_common(1)[0][0]
+
+    def add(self, text, observation):
+        self.seen += 1
+        self.last_seen = observation
+        self.variants[text] += 1
+        if len(self.variants) > MAX_VARIANTS:
+            del self.variants[min(self.variants, key=self.variants.get)]
+
+
+class DocumentBuffer:
+    """Bounded, deduplicating store of the lines read from a document"""
+
+    def __init__(self, max_lines=200, confirmations=2, similarity=0.8,
+                 candidate_ttl=30, min_length=3, max_line_length=500):
+        """
+        confirmations: observations needed before a line is confirmed
+        similarity: ``SequenceMatcher`` ratio at which two readings count as
+            the same line
+        candidate_ttl: observations after which an unconfirmed line that was
+            not seen again is dropped as OCR noise
+        """
+        self.max_lines = max_lines
+        self.confirmations = confirmations
+        self.similarity = similarity
+        self.candidate_ttl = candidate_ttl
+        self.min_length = min_length
+        self.max_line_length = max_line_length
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        """Forget every line, e.g. when a new document is started"""
+        with self._lock:
+            self._lines = []
+            self._observation = 0
+
+    def __len__(self):
+        return len(self._lines)
+
+    def observe(self, lines):
+        """Add one frame's OCR lines; returns the lines confirmed by this frame"""
+        if isinstance(lines, str):
+            lines = lines.splitlines()
+        with self._lock:
+            self._observation += 1
+            confirmed = []
+            matched = set()
+            for text in lines:
+                text = clean_text(text)[:self.max_line_length]
+                if len(text) < self.min_length:
+                    continue
+                line = self._match(text, matched)
+                if line is None:
+                    line = _Line(text, self._observation)
+                    self._lines.append(line)
+                else:
+                    line.add(text, self._observation)
+                matched.add(id(line))
+                if not line.confirmed and line.seen >= self.confirmations:
+                    line.confirmed = True
+                    confirmed.append(line)
+            self._evict()
+            # Report the settled spelling, not the variant read this frame
+            return [line.text for line in confirmed]
+
+    def _match(self, text, matched):
+        """The stored line most similar to ``text`` above the threshold, if any"""
+        best, best_ratio = None, self.similarity
+        matcher = difflib.SequenceMatcher(autojunk=False)
+        matcher.set_seq2(text)
+        for line in self._lines:
+            # A frame contributes at most one observation to each line
+            if id(line) in matched:
+                continue
+            if text in line.variants:
+                return line
+            matcher.set_seq1(line.text)
+            # Cheap upper bounds first; ratio() is quadratic in line length
+            if (matcher.real_quick_ratio() < best_ratio
+                    or matcher.quick_ratio() < best_ratio):
+                continue
+            ratio = matcher.ratio()
+            if ratio >= best_ratio:
+                best, best_ratio = line, ratio
+        return best
+
+    def _evict(self):
+        stale = self._observation - self.candidate_ttl
+        self._lines = [line for line in self._lines
+                       if line.confirmed or line.last_seen > stale]
+        excess = len(self._lines) - self.max_lines
+        if excess <= 0:
+            return
+        # Unconfirmed candidates go first, then the oldest confirmed lines
+        order = sorted(range(len(self._lines)),
+                       key=lambda i: (self._lines[i].confirmed, self._lines[i].last_seen))
+        drop = set(order[:excess])
+        self._lines = [line for i, line in enumerate(self._lines) if i not in drop]
+
+    def confirmed_lines(self):
+        """Confirmed lines in the order they were first read"""
+        with self._lock:
+            return [line.text for line in self._lines if line.confirmed]
+
+    def full_text(self):
+        return " ".join(self.confirmed_lines())
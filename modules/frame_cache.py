@@ -0,0 +1,92 @@
+"""
+Per-frame result cache so each model runs at most once per captured frame
+"""
+
+import threading
+from collections import OrderedDict
+
+
+class FrameResultCache:
+    """Results keyed by frame sequence number and a call key.
+
+    Only the most recent ``max_frames`` frames are kept. When two threads ask
+    for the same result at once, the second waits for the first instead of
+    running the model again.
+    """
+
+    def __init__(self, max_frames=4):
+        self.max_frames = max_frames
+        self.hits = 0
+        self.misses = 0
+        self._frames = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, frame_id, key, compute):
+        if frame_id is None:
+            return compute()
+
+        with self._lock:
+            entries = self._frames.get(frame_id)
+            if entries is not None and key in entries:
+                self.hits += 1
+                return entries[key]
+            pending = self._inflight.get((frame_id, key))
+            if pending is None:
+                pending = self._inflight[(frame_id, key)] = threading.Event()
+                owner = True
+                self.misses += 1
+            else:
+                owner = False
+
+        if not owner:
+            pending.wait()
+            with self._lock:
+                entries = self._frames.get(frame_id)
+                if entries is not None and key in entries:
+                    self.hits += 1
+                    return entries[key]
+            # The owner failed or the frame was evicted meanwhile
+            return compute()
+
+        try:
+            result = compute()
+            self.put(frame_id, key, result)
+            return result
+        finally:
+            with self._lock:
+                self._inflight.pop((frame_id, key), None)
+            pending.set()
+
+    def get(self, frame_id, key):
+        """Cached result for ``frame_id``/``key``, or None"""
+        if frame_id is None:
+            return None
+        with self._lock:
+            entries = self._frames.get(frame_id)
+            if entries is None or key not in entries:
+                return None
+            self.hits += 1
+            return entries[key]
+
+    def put(self, frame_id, key, result):
+        if frame_id is None:
+            return
+        with self._lock:
+            self._frames.setdefault(frame_id, {})[key] = result
+            self._frames.move_to_end(frame_id)
+            while len(self._frames) > self.max_frames:
+                self._frames.popitem(last=False)
+
+    def reserve(self, frames):
+        """Keep at least ``frames`` frames, e.g. one whole batch"""
+        with self._lock:
+            self.max_frames = max(self.max_frames, frames)
+
+    def clear(self):
+        with self._lock:
+            self._frames.clear()
+
+
+# Shared by every detector module in this process
+frame_cache = FrameResultCache()
@@ -0,0 +1,118 @@
+"""
+Threaded camera capture that always hands out the newest frame
+"""
+
+import threading
+import time
+from collections import deque, namedtuple
+
+import cv2
+
+CapturedFrame = namedtuple("CapturedFrame", ["seq", "timestamp", "image"])
+
+
+class FrameCapture:
+    """Read a camera on a background thread into a small ring buffer.
+
+    Frames are numbered from 1 and stamped with ``time.time()`` as soon as
+    they are grabbed. Older frames fall off the buffer, so consumers that are
+    slower than the camera skip straight to the freshest image instead of
+    working through OpenCV's internal queue.
+    """
+
+    def __init__(self, source=0, buffer_size=1):
+        self.source = source
+        self.cap = None
+        self.failed = False
+        self.dropped = 0
+        self._frames = deque(maxlen=max(1, buffer_size))
+        self._cond = threading.Condition()
+        self._seq = 0
+        self._last_read_seq = 0
+        self._running = False
+        self._thread = None
+        self._interval = 0.0
+        self._wake = threading.Event()
+
+    def open(self):
+        self.cap = cv2.VideoCapture(self.source)
+        if not self.cap.isOpened():
+            return False
+        # Keep the driver-side queue as short as the backend allows
+        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        return True
+
+    def isOpened(self):
+        return self.cap is not None and self.cap.isOpened()
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="FrameCapture", daemon=True)
+        self._thread.start()
+
+    def set_frame_interval(self, seconds):
+        """Pause ``seconds`` between grabs (0 = camera rate), e.g. while idle"""
+        seconds = max(0.0, seconds)
+        if seconds == self._interval:
+            return
+        self._interval = seconds
+        # Cut the current pause short so the new rate applies right away
+        self._wake.set()
+
+    def _run(self):
+        while self._running:
+            if self._interval:
+                # Idle: leave the camera alone between frames; a new interval wakes us
+                self._wake.wait(self._interval)
+                self._wake.clear()
+            ret, image = self.cap.read()
+            timestamp = time.time()
+            with self._cond:
+                if not ret:
+                    self.failed = True
+                    self._running = False
+                    self._cond.notify_all()
+                    break
+                self._seq += 1
+                self._frames.append(CapturedFrame(self._seq, timestamp, image))
+                self._cond.notify_all()
+
+    def read(self, timeout=2.0):
+        """Wait for a frame newer than the last one read and return it.
+
+        Returns None if the camera failed or nothing arrived within
+        ``timeout`` seconds (plus the idle frame interval, if one is set).
+        """
+        deadline = time.time() + timeout + self._interval
+        with self._cond:
+            while not self._frames or self._frames[-1].seq <= self._last_read_seq:
+                remaining = deadline - time.time()
+                if self.failed or remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+            frame = self._frames[-1]
+            if self._last_read_seq:
+                self.dropped += frame.seq - self._last_read_seq - 1
+            self._last_read_seq = frame.seq
+            return frame
+
+    def latest(self):
+        """Newest buffered frame without waiting, or None"""
+        with self._cond:
+            return self._frames[-1] if self._frames else None
+
+    def recent(self):
+        """All buffered frames, oldest first"""
+        with self._cond:
+            return list(self._frames)
+
+    def release(self):
+        self._running = False
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        if self.cap is not None:
+            self.cap.release()
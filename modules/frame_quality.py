@@ -0,0 +1,140 @@
+"""
+Cheap image-quality measures and the pre-OCR gate built on them
+
+All measures run on a grayscale image and take a few milliseconds on a
+camera frame, so frames that could never give readable text (blurred, too
+dark or bright, no text-like edges) are turned away before a full OCR pass.
+The lighting and edge measures are shared with scene_description.
+"""
+
+from collections import Counter
+
+import cv2
+
+BRIGHTNESS_THRESHOLDS = {
+    'very_dark': 30,
+    'dark': 80,
+    'normal': 180,
+    'bright': 220
+}
+
+# Frames wider than this are measured on a downscaled copy
+MAX_MEASURE_WIDTH = 640
+
+
+def to_gray(frame):
+    return frame if frame.ndim == 2 else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+
+def lighting_stats(gray, thresholds=BRIGHTNESS_THRESHOLDS):
+    """Brightness mean/spread of a gray image and their spoken description"""
+    avg_brightness, brightness_std = cv2.meanStdDev(gray)
+    avg_brightness, brightness_std = float(avg_brightness[0, 0]), float(brightness_std[0, 0])
+
+    if avg_brightness < thresholds['very_dark']:
+        condition = 'very dark'
+    elif avg_brightness < thresholds['dark']:
+        condition = 'dimly lit'
+    elif avg_brightness < thresholds['normal']:
+        condition = 'well-lit'
+    elif avg_brightness < thresholds['bright']:
+        condition = 'bright'
+    else:
+        condition = 'very bright'
+
+    evenness = 'even' if brightness_std < 40 else 'uneven'
+    return {'condition': condition, 'evenness': evenness, 'brightness_value': avg_brightness,
+            'brightness_std': brightness_std}
+
+
+def edge_stats(gray, low=100, high=200):
+    """(count, density) of Canny edge pixels; density is the fraction of the image"""
+    edges = cv2.Canny(gray, low, high)
+    count = int(cv2.countNonZero(edges))
+    return count, count / float(edges.size or 1)
+
+
+def focus_measure(gray):
+    """Variance of the Laplacian: low for blurred or out-of-focus images.
+
+    A 3x3 blur first keeps sensor noise from passing as sharp detail.
+    """
+    return float(cv2.Laplacian(cv2.GaussianBlur(gray, (3, 3), 0), cv2.CV_64F).var())
+
+
+class FrameQualityGate:
+    """Decide whether a frame (or ROI) is worth sending to OCR"""
+
+    def __init__(self, min_focus=40.0, min_brightness=40.0, max_brightness=235.0,
+                 min_contrast=15.0, min_edge_density=0.01, max_edge_density=0.35):
+        """
+        min_focus: Laplacian variance below which the image counts as blurred
+        min_contrast: gray-level standard deviation below which nothing on
+            the page stands out
+        min_edge_density / max_edge_density: share of edge pixels expected
+            of text; fewer means a blank surface, more means clutter or noise
+        """
+        self.min_focus = min_focus
+        self.min_brightness = min_brightness
+        self.max_brightness = max_brightness
+        self.min_contrast = min_contrast
+        self.min_edge_density = min_edge_density
+        self.max_edge_density = max_edge_density
+        self.passed = 0
+        self.rejected = 0
+        self.rejections = Counter()
+        self.last_report = None
+
+    def check(self, frame):
+        """Quality report for ``frame``: {'ok', 'reasons', measures...}"""
+        gray = to_gray(frame)
+        if gray.shape[1] > MAX_MEASURE_WIDTH:
+            scale = MAX_MEASURE_WIDTH / float(gray.shape[1])
+            gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+        lighting = lighting_stats(gray)
+        brightness, contrast = lighting['brightness_value'], lighting['brightness_std']
+        reasons = []
+        if brightness < self.min_brightness:
+            reasons.append("too dark")
+        elif brightness > self.max_brightness:
+            reasons.append("too bright")
+        if contrast < self.min_contrast:
+            reasons.append("low contrast")
+
+        focus = edge_density = None
+        # Blur and edge checks mean nothing on an image with no light in it
+        if not reasons:
+            focus = focus_measure(gray)
+            if focus < self.min_focus:
+                reasons.append("blurry")
+            _, edge_density = edge_stats(gray)
+            if edge_density < self.min_edge_density:
+                reasons.append("no text")
+            elif edge_density > self.max_edge_density:
+                reasons.append("too cluttered")
+
+        report = {'ok': not reasons, 'reasons': reasons, 'brightness': brightness,
+                  'contrast': contrast, 'focus': focus, 'edge_density': edge_density}
+        if reasons:
+            self.rejected += 1
+            self.rejections.update(reasons)
+        else:
+            self.passed += 1
+        self.last_report = report
+        return report
+
+
+# Spoken hint for each rejection reason
+GUIDANCE = {
+    "too dark": "It is too dark to read. Try more light.",
+    "too bright": "There is too much glare. Tilt the page or move away from the light.",
+    "low contrast": "The page is hard to make out. Try more light.",
+    "blurry": "The image is blurry. Hold the page still.",
+    "no text": "I cannot see any text. Point the camera at the page.",
+    "too cluttered": "The view is cluttered. Hold the page closer and flat.",
+}
+
+def guidance(report):
+    """Spoken hint for the first reason ``report`` was rejected, or ''"""
+    return GUIDANCE.get(report['reasons'][0], "") if report['reasons'] else ""
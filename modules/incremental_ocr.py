@@ -0,0 +1,175 @@
+"""
+Two-stage OCR for a camera pointed at the same page
+
+EasyOCR's ``readtext`` runs text detection (CRAFT) and recognition on the
+whole frame every time. Here the two stages are split: text boxes are
+detected only when the view has moved (or every ``redetect_every`` frames),
+each box is tracked with a thumbnail of its crop, and recognition runs only
+on boxes that are new or whose crop changed, in one batched ``recognize``
+call. Unchanged boxes reuse their previous text until the next detection,
+which reads every box again.
+"""
+
+import threading
+
+import cv2
+import numpy as np
+
+from modules.utils import clean_text, limit_text_length
+
+# Height of the crop thumbnail used to tell whether a line changed between
+# frames; its width follows the crop's aspect ratio, giving a few cells per
+# glyph, so a single changed character shows up
+SIGNATURE_HEIGHT = 16
+
+
+def _iou(a, b):
+    """IoU of two (x_min, x_max, y_min, y_max) boxes"""
+    w = min(a[1], b[1]) - max(a[0], b[0])
+    h = min(a[3], b[3]) - max(a[2], b[2])
+    if w <= 0 or h <= 0:
+        return 0.0
+    inter = w * h
+    area_a = (a[1] - a[0]) * (a[3] - a[2])
+    area_b = (b[1] - b[0]) * (b[3] - b[2])
+    return inter / float(area_a + area_b - inter)
+
+
+class _Region:
+    __slots__ = ("box", "signature", "text", "confidence")
+
+    def __init__(self, box):
+        self.box = box
+        self.signature = None
+        self.text = ""
+        self.confidence = 0.0
+
+
+class IncrementalOCR:
+    """Track text boxes across frames and recognize only what changed"""
+
+    def __init__(self, reader, min_confidence=0.5, redetect_every=15,
+                 motion_threshold=6.0, change_threshold=48, match_iou=0.5):
+        """
+        reader: an OCRReader; its EasyOCR engine and preprocessing are used
+        motion_threshold: mean gray-level difference of the downsampled frame
+            above which text boxes are detected again
+        change_threshold: largest gray-level difference of any crop thumbnail
+            cell above which that crop is recognized again (sensor noise
+            stays well below it, one changed glyph goes well above)
+        """
+        self.reader = reader
+        self.min_confidence = min_confidence
+        self.redetect_every = redetect_every
+        self.motion_threshold = motion_threshold
+        self.change_threshold = change_threshold
+        self.match_iou = match_iou
+        self.stats = {"frames": 0, "detections": 0, "recognized": 0, "reused": 0}
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Forget tracked regions, e.g. when a new page is shown"""
+        self._regions = []
+        self._last_small = None
+        self._frames_since_detect = 0
+
+    def read(self, frame):
+        """Text of ``frame`` in reading order, recognizing only new or changed boxes"""
+        return limit_text_length(" ".join(self.read_lines(frame)), max_length=500)
+
+    def read_lines(self, frame):
+        """Text of each box in ``frame``, top to bottom, as a list of lines"""
+        if frame is None or frame.size == 0:
+            return []
+        easyocr_reader = self.reader.easyocr_reader
+        if easyocr_reader is None:
+            # Tesseract has no separate detection stage; read the frame as before
+            text = self.reader.read_text_from_frame(frame)
+            return [text] if text else []
+
+        with self._lock:
+            gray = self.reader._preprocess_image(frame)
+            self.stats["frames"] += 1
+            try:
+                if self._needs_detection(gray):
+                    self._detect(easyocr_reader, gray)
+                self._recognize_changed(easyocr_reader, gray)
+            except Exception as e:
+                print(f"[IncrementalOCR] EasyOCR failed: {e}")
+                self.reset()
+                text = self.reader.read_text_from_frame(frame)
+                return [text] if text else []
+
+            regions = sorted(self._regions, key=lambda r: (r.box[2], r.box[0]))
+            lines = (clean_text(r.text) for r in regions if r.text and r.confidence > self.min_confidence)
+            return [line for line in lines if line]
+
+    def _needs_detection(self, gray):
+        small = cv2.resize(gray, (64, 48), interpolation=cv2.INTER_AREA).astype(np.int16)
+        moved = (self._last_small is None
+                 or float(np.mean(np.abs(small - self._last_small))) > self.motion_threshold)
+        self._frames_since_detect += 1
+        if moved or self._frames_since_detect >= self.redetect_every:
+            self._last_small = small
+            return True
+        return False
+
+    def _detect(self, easyocr_reader, gray):
+        # detect() returns one box list per input image, like readtext() uses it
+        horizontal, free = easyocr_reader.detect(gray)
+        boxes = [tuple(int(v) for v in box) for box in horizontal[0]]
+        # Rotated boxes are tracked and recognized by their bounding rectangle
+        for poly in free[0]:
+            pts = np.asarray(poly, dtype=np.int32)
+            boxes.append((int(pts[:, 0].min()), int(pts[:, 0].max()),
+                          int(pts[:, 1].min()), int(pts[:, 1].max())))
+
+        h, w = gray.shape[:2]
+        previous = list(self._regions)
+        regions = []
+        for box in boxes:
+            box = (max(0, box[0]), min(w, box[1]), max(0, box[2]), min(h, box[3]))
+            if box[1] - box[0] < 2 or box[3] - box[2] < 2:
+                continue
+            # Match the best-overlapping box from before, but read it again:
+            # each detection corrects any change its signature missed
+            best = max(previous, key=lambda r: _iou(r.box, box), default=None)
+            if best is not None and _iou(best.box, box) >= self.match_iou:
+                previous.remove(best)
+                best.box = box
+                best.signature = None
+                regions.append(best)
+            else:
+                regions.append(_Region(box))
+        self._regions = regions
+        self._frames_since_detect = 0
+        self.stats["detections"] += 1
+
+    def _recognize_changed(self, easyocr_reader, gray):
+        changed = []
+        for region in self._regions:
+            x0, x1, y0, y1 = region.box
+            width = max(8, round((x1 - x0) * SIGNATURE_HEIGHT / (y1 - y0)))
+            signature = cv2.resize(gray[y0:y1, x0:x1], (width, SIGNATURE_HEIGHT),
+                                   interpolation=cv2.INTER_AREA).astype(np.int16)
+            if (region.signature is None or region.signature.shape != signature.shape
+                    or int(np.abs(signature - region.signature).max()) > self.change_threshold):
+                region.signature = signature
+                changed.append(region)
+        self.stats["reused"] += len(self._regions) - len(changed)
+        if not changed:
+            return
+
+        # One recognizer pass over every changed crop, batched by EasyOCR
+        results = easyocr_reader.recognize(gray, horizontal_list=[list(r.box) for r in changed],
+                                           free_list=[], batch_size=len(changed))
+        self.stats["recognized"] += len(changed)
+        for region in changed:
+            region.text, region.confidence = "", 0.0
+        # recognize() returns boxes as corner points; map them back by position
+        by_corner = {(r.box[0], r.box[2]): r for r in changed}
+        for box, text, confidence in results:
+            region = by_corner.get((int(box[0][0]), int(box[0][1])))
+            if region is not None:
+                region.text, region.confidence = text, float(confidence)
@@ -0,0 +1,135 @@
+"""
+Background inference stage that keeps model calls off the display loop
+"""
+
+import queue
+import threading
+import time
+from collections import deque, namedtuple
+
+from modules import latency_trace
+
+# kind is "result" or "error"; latency is in seconds from submit to finish
+InferenceEvent = namedtuple("InferenceEvent", ["kind", "mode", "seq", "result", "latency"])
+
+_Job = namedtuple("_Job", ["generation", "mode", "seq", "frame", "submitted", "captured_at"])
+
+
+class InferenceWorker:
+    """Run ``handler(mode, frame, seq)`` on a worker thread.
+
+    Jobs wait in a bounded queue; when it is full the oldest job is dropped,
+    so the worker always moves on to recent frames. ``cancel()`` discards
+    everything queued for the previous mode, and results of a job that was
+    cancelled while running are not reported. Finished jobs come back as
+    ``InferenceEvent`` objects through ``poll_events()``.
+
+    While a job runs, a ``latency_trace.FrameTrace`` for its frame is active
+    on the worker thread, so model calls and speech it triggers are timed
+    against the frame's capture time.
+    """
+
+    def __init__(self, handler, max_pending=2):
+        self.handler = handler
+        self.dropped = 0
+        self._pending = deque(maxlen=max(1, max_pending))
+        self._urgent = deque()
+        self._cond = threading.Condition()
+        self._events = queue.Queue()
+        self._generation = 0
+        self._local = threading.local()
+        self._busy = False
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="InferenceWorker", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._pending.clear()
+            self._urgent.clear()
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    def submit(self, mode, seq, frame, urgent=False, captured_at=None):
+        """Queue a frame for ``mode``, dropping the oldest job if full.
+
+        Urgent jobs (explicit user requests) run before streamed frames and
+        are never dropped for backpressure, only by ``cancel()``.
+        ``captured_at`` is the frame's capture time (``time.time()``);
+        it defaults to now.
+        """
+        with self._cond:
+            now = time.time()
+            job = _Job(self._generation, mode, seq, frame, now, captured_at or now)
+            if urgent:
+                self._urgent.append(job)
+            else:
+                if len(self._pending) == self._pending.maxlen:
+                    self.dropped += 1
+                self._pending.append(job)
+            self._cond.notify()
+
+    def cancel(self):
+        """Drop queued jobs and disown the one currently running"""
+        with self._cond:
+            self._generation += 1
+            self._pending.clear()
+            self._urgent.clear()
+
+    def is_cancelled(self):
+        """True when called from a job that has been cancelled since it started"""
+        generation = getattr(self._local, "generation", None)
+        return generation is not None and generation != self._generation
+
+    @property
+    def busy(self):
+        return self._busy or bool(self._pending) or bool(self._urgent)
+
+    def poll_events(self):
+        """Return every event produced since the last poll, without blocking"""
+        events = []
+        while True:
+            try:
+                events.append(self._events.get_nowait())
+            except queue.Empty:
+                return events
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._running and not (self._pending or self._urgent):
+                    self._cond.wait()
+                if not self._running:
+                    return
+                job = self._urgent.popleft() if self._urgent else self._pending.popleft()
+                self._busy = True
+
+            self._local.generation = job.generation
+            trace = latency_trace.FrameTrace(job.seq, job.captured_at, job.mode)
+            trace.mark("queue", (time.time() - job.submitted) * 1000)
+            latency_trace.activate(trace)
+            try:
+                with latency_trace.stage("handler"):
+                    result = self.handler(job.mode, job.frame, job.seq)
+                kind = "result"
+            except Exception as e:
+                result = e
+                kind = "error"
+            finally:
+                latency_trace.deactivate()
+                self._local.generation = None
+                self._busy = False
+            latency_trace.latency_stats.maybe_log()
+
+            if job.generation == self._generation:
+                latency = time.time() - job.submitted
+                self._events.put(InferenceEvent(kind, job.mode, job.seq, result, latency))
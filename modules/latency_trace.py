@@ -0,0 +1,188 @@
+"""
+Per-frame latency tracing, from camera capture to the start of speech
+
+Each frame picked up by the inference worker gets a FrameTrace carrying its
+sequence number and capture timestamp. Stages timed while it is active
+(queue wait, model calls, the mode handler) are added to it, and when a
+result is spoken the trace records how long it took from the frame being
+captured to the user hearing it. Every stage also feeds a rolling histogram;
+summaries and spoken-frame records are written to logs/system.log as JSON
+lines.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+
+_root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LOG_PATH = os.path.join(_root_dir, "logs", "system.log")
+
+# Upper bucket edges in ms for the histogram counts in summaries
+BUCKETS_MS = (5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+SUMMARY_INTERVAL = 10.0
+
+_local = threading.local()
+
+
+class FrameTrace:
+    """Stage timings for one captured frame"""
+
+    def __init__(self, seq, captured_at, mode=None):
+        self.seq = seq
+        self.captured_at = captured_at
+        self.mode = mode
+        self.stages = {}
+        self.spoken = False
+
+    def mark(self, stage, ms):
+        self.stages[stage] = self.stages.get(stage, 0.0) + ms
+        latency_stats.record(stage, ms)
+
+    def age_ms(self, now=None):
+        return ((now or time.time()) - self.captured_at) * 1000
+
+    def speech_started(self, text, requested_at):
+        """Called by the TTS engine just before it starts speaking for this frame"""
+        now = time.time()
+        self.mark("tts_start", (now - requested_at) * 1000)
+        glass_to_speech = self.age_ms(now)
+        # Only the first announcement of a frame counts towards the histogram
+        if not self.spoken:
+            latency_stats.record("glass_to_speech", glass_to_speech)
+            self.spoken = True
+        structured_log.write("speech", seq=self.seq, mode=self.mode,
+                             glass_to_speech_ms=round(glass_to_speech, 1),
+                             stages={k: round(v, 1) for k, v in self.stages.items()},
+                             text=text[:80])
+
+
+def current():
+    """The trace of the frame being processed on this thread, or None"""
+    return getattr(_local, "trace", None)
+
+
+def activate(trace):
+    _local.trace = trace
+
+
+def deactivate():
+    _local.trace = None
+
+
+@contextmanager
+def stage(name):
+    """Time a block and add it to the current frame's trace"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        ms = (time.perf_counter() - started) * 1000
+        trace = current()
+        if trace is not None:
+            trace.mark(name, ms)
+        else:
+            latency_stats.record(name, ms)
+
+
+class RollingHistogram:
+    """The last ``window`` samples of one stage, in milliseconds"""
+
+    def __init__(self, window=512):
+        self.samples = deque(maxlen=window)
+        self.total = 0
+
+    def add(self, ms):
+        self.samples.append(ms)
+        self.total += 1
+
+    def summary(self):
+        if not self.samples:
+            return {"n": 0}
+        values = np.fromiter(self.samples, dtype=np.float64)
+        p50, p95, p99 = np.percentile(values, [50, 95, 99])
+        counts = np.histogram(values, bins=(0,) + BUCKETS_MS + (np.inf,))[0]
+        return {
+            "n": len(values),
+            "total": self.total,
+            "p50": round(float(p50), 1),
+            "p95": round(float(p95), 1),
+            "p99": round(float(p99), 1),
+            "max": round(float(values.max()), 1),
+            "hist": counts.tolist(),
+        }
+
+
+class LatencyStats:
+    """Rolling histograms for every stage name seen so far"""
+
+    def __init__(self, window=512, summary_interval=SUMMARY_INTERVAL):
+        self.window = window
+        self.summary_interval = summary_interval
+        self._histograms = {}
+        self._lock = threading.Lock()
+        self._last_summary = time.time()
+
+    def record(self, stage, ms):
+        with self._lock:
+            histogram = self._histograms.get(stage)
+            if histogram is None:
+                histogram = self._histograms[stage] = RollingHistogram(self.window)
+            histogram.add(ms)
+
+    def summary(self):
+        with self._lock:
+            return {stage: h.summary() for stage, h in sorted(self._histograms.items())}
+
+    def maybe_log(self):
+        """Write a summary to the structured log every ``summary_interval`` seconds"""
+        now = time.time()
+        with self._lock:
+            if now - self._last_summary < self.summary_interval or not self._histograms:
+                return False
+            self._last_summary = now
+        self.log_summary()
+        return True
+
+    def log_summary(self):
+        structured_log.write("latency_summary", buckets_ms=list(BUCKETS_MS), stages=self.summary())
+
+    def overlay_lines(self, stages=("glass_to_speech", "queue", "handler")):
+        """Short p50/p95 lines for drawing on the preview window"""
+        summary = self.summary()
+        lines = []
+        for name in stages + tuple(s for s in summary if s.startswith("model.")):
+            s = summary.get(name)
+            if s and s["n"]:
+                lines.append(f"{name}: {s['p50']:.0f}/{s['p95']:.0f} ms")
+        return lines
+
+
+class StructuredLog:
+    """Append-only JSON-lines log, UTF-16 with CRLF like the existing logs/system.log"""
+
+    def __init__(self, path=LOG_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def write(self, event, **fields):
+        record = {"ts": time.strftime("%Y-%m-%dT%H:%M:%S"), "event": event}
+        record.update(fields)
+        line = json.dumps(record, ensure_ascii=False) + "\r\n"
+        with self._lock:
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                with open(self.path, "ab") as f:
+                    if f.tell() == 0:
+                        f.write(b"\xff\xfe")
+                    f.write(line.encode("utf-16-le"))
+            except OSError as e:
+                print(f"[latency_trace] cannot write {self.path}: {e}")
+
+
+latency_stats = LatencyStats()
+structured_log = StructuredLog()
@@ -0,0 +1,321 @@
+"""
+Process-wide registry of YOLO models shared by all detector modules
+
+Models can run on PyTorch or on an exported ONNX Runtime / OpenVINO copy of
+the same weights, in FP32 or INT8. Exports are made on first use next to the
+.pt file and reused afterwards; if a variant cannot be built or loaded the
+model falls back to FP32 PyTorch.
+"""
+
+import os
+import threading
+from collections import namedtuple
+
+from modules.frame_cache import frame_cache
+
+_root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODELS_DIR = os.path.join(_root_dir, "models")
+
+
+def env_choice(name, choices, default=None):
+    """Lower-cased value of environment variable ``name``, or ``default`` if
+    it is unset or not one of ``choices``.
+
+    Detector modules read their settings at import, so a mistyped variable
+    is reported instead of raised (explicit arguments still raise).
+    """
+    value = os.environ.get(name)
+    if not value:
+        return default
+    if value.lower() not in choices:
+        print(f"[model_registry] Ignoring {name}={value!r} (choose from {', '.join(choices)})")
+        return default
+    return value.lower()
+
+
+# "torch", "onnx" or "openvino"; VISO_BACKEND sets the default for every model
+BACKENDS = ("torch", "onnx", "openvino")
+DEFAULT_BACKEND = env_choice("VISO_BACKEND", BACKENDS, "torch")
+
+# "fp32" or "int8"; INT8 needs an exported backend, so it implies ONNX when
+# the backend is PyTorch
+PRECISIONS = ("fp32", "int8")
+DEFAULT_PRECISION = env_choice("VISO_PRECISION", PRECISIONS, "fp32")
+
+# Calibration data for OpenVINO INT8 export (an ultralytics dataset YAML)
+INT8_CALIBRATION_DATA = os.environ.get("VISO_INT8_DATA", "coco8.yaml")
+
+# One registry entry per weights file, backend and precision
+ModelKey = namedtuple("ModelKey", ["path", "backend", "precision"])
+
+_registry_lock = threading.Lock()
+_entries = {}
+
+
+class SharedModel:
+    """Thread-safe handle around one loaded model.
+
+    Attribute access is forwarded to the wrapped model, while ``predict`` and
+    calls are serialized because ultralytics models are not safe to run from
+    several threads at once.
+    """
+
+    def __init__(self, model, path):
+        self._model = model
+        self._predict_lock = threading.Lock()
+        self.path = path
+
+    def predict(self, *args, **kwargs):
+        with self._predict_lock:
+            return self._model.predict(*args, **kwargs)
+
+    def __call__(self, *args, **kwargs):
+        with self._predict_lock:
+            return self._model(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._model, name)
+
+
+class _Entry:
+    def __init__(self, key):
+        self.key = key
+        self.path = key.path
+        self.model = None
+        self.failed = False
+        self.refcount = 0
+        self.loaded_as = None
+        self.load_lock = threading.Lock()
+
+
+def resolve_model_path(path):
+    """Resolve a weights path, looking in ``models/`` for relative names"""
+    if os.path.isabs(path):
+        return os.path.realpath(path)
+    if os.path.isfile(path):
+        return os.path.realpath(path)
+    candidate = os.path.join(_root_dir, path)
+    if os.path.isfile(candidate) or os.path.dirname(path):
+        return os.path.realpath(candidate)
+    return os.path.realpath(os.path.join(MODELS_DIR, path))
+
+
+def model_key(path, backend=None, precision=None):
+    """Normalise ``path``/``backend``/``precision`` into a registry key"""
+    if isinstance(path, ModelKey):
+        return path
+    backend = (backend or DEFAULT_BACKEND).lower()
+    precision = (precision or DEFAULT_PRECISION).lower()
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown inference backend: {backend}")
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown model precision: {precision}")
+    if precision == "int8" and backend == "torch":
+        backend = "onnx"
+    return ModelKey(resolve_model_path(path), backend, precision)
+
+
+def _get_entry(key):
+    key = model_key(key)
+    with _registry_lock:
+        entry = _entries.get(key)
+        if entry is None:
+            entry = _Entry(key)
+            _entries[key] = entry
+        return entry
+
+
+def exported_model_path(path, backend, precision="fp32"):
+    """Where the export of ``path`` for ``backend``/``precision`` is cached"""
+    stem = os.path.splitext(path)[0]
+    suffix = "_int8" if precision == "int8" else ""
+    if backend == "onnx":
+        return stem + suffix + ".onnx"
+    if backend == "openvino":
+        return stem + suffix + "_openvino_model"
+    return path
+
+
+def _is_fresh(target, source):
+    return os.path.exists(target) and os.path.getmtime(target) >= os.path.getmtime(source)
+
+
+def _export(path, backend, precision="fp32"):
+    """Export ``path`` for ``backend`` unless an up-to-date export exists"""
+    target = exported_model_path(path, backend, precision)
+    if _is_fresh(target, path):
+        return target
+
+    name = os.path.basename(path)
+    if backend == "onnx" and precision == "int8":
+        # Dynamic INT8 quantization of the FP32 export; needs no calibration set
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        fp32_path = _export(path, "onnx")
+        print(f"[model_registry] quantizing {name} to INT8 (onnx)...")
+        quantize_dynamic(fp32_path, target, weight_type=QuantType.QUInt8)
+        return target
+
+    from ultralytics import YOLO
+    print(f"[model_registry] exporting {name} for {backend} ({precision})...")
+    if precision == "int8":
+        exported = YOLO(path).export(format=backend, int8=True, data=INT8_CALIBRATION_DATA)
+    else:
+        exported = YOLO(path).export(format=backend, dynamic=True)
+    return str(exported) if exported else target
+
+
+def load_yolo(path, backend="torch", precision="fp32"):
+    """Load a YOLO model for one backend/precision, exporting it if needed"""
+    from ultralytics import YOLO
+    if backend == "torch" and precision == "fp32":
+        return YOLO(path)
+    return YOLO(_export(path, backend, precision), task="detect")
+
+
+def acquire_model(path, backend=None, precision=None):
+    """Register interest in a model and return its registry key.
+
+    Loading is deferred to ``get_model``. ``backend`` and ``precision`` pick
+    the runtime (defaults: DEFAULT_BACKEND, DEFAULT_PRECISION); callers asking
+    for the same combination share one copy.
+    """
+    entry = _get_entry(model_key(path, backend, precision))
+    with _registry_lock:
+        entry.refcount += 1
+    return entry.key
+
+
+def get_model(key, loader=None):
+    """Return the shared model for ``key``, loading it on first use.
+
+    ``loader(path)`` replaces the YOLO loader, e.g. for tests. Returns None if
+    the weights are missing or failed to load; a failed load is not retried
+    until the model is explicitly unloaded.
+    """
+    entry = _get_entry(key)
+    if entry.model is not None or entry.failed:
+        return entry.model
+
+    with entry.load_lock:
+        if entry.model is not None or entry.failed:
+            return entry.model
+        name = os.path.basename(entry.path)
+        if not os.path.isfile(entry.path):
+            print(f"[model_registry] {name} not found in 'models/'.")
+            entry.failed = True
+            return None
+
+        if loader is not None:
+            try:
+                entry.model = SharedModel(loader(entry.path), entry.path)
+                print(f"[model_registry] {name} loaded.")
+            except Exception as e:
+                print(f"[model_registry] {name} load failed: {e}")
+                entry.failed = True
+            return entry.model
+
+        requested = (entry.key.backend, entry.key.precision)
+        for backend, precision in dict.fromkeys([requested, ("torch", "fp32")]):
+            try:
+                entry.model = SharedModel(load_yolo(entry.path, backend, precision), entry.path)
+                entry.loaded_as = (backend, precision)
+                print(f"[model_registry] {name} loaded ({backend}, {precision}).")
+                break
+            except Exception as e:
+                print(f"[model_registry] {name} {backend}/{precision} load failed: {e}")
+        else:
+            entry.failed = True
+        return entry.model
+
+
+def model_backend(key):
+    """(backend, precision) the model is actually running on, or None"""
+    return _get_entry(key).loaded_as
+
+
+def accepts_imgsz(key):
+    """False for exports with a fixed input shape, where ``imgsz`` must not change"""
+    key = model_key(key)
+    # FP32 exports are dynamic; OpenVINO INT8 is calibrated at one size
+    return not (key.backend == "openvino" and key.precision == "int8")
+
+
+def predict(key, frame, frame_id=None, **kwargs):
+    """Run the shared model for ``key`` on ``frame``.
+
+    When ``frame_id`` (the capture sequence number) is given, the raw results
+    are cached for that frame, so every caller making the same call on the
+    same frame shares one inference pass. Returns None if the model is
+    unavailable.
+    """
+    key = model_key(key)
+    model = get_model(key)
+    if model is None:
+        return None
+    call_key = (key, tuple(sorted(kwargs.items())))
+    return frame_cache.get_or_compute(frame_id, call_key, lambda: model.predict(frame, **kwargs))
+
+
+def predict_batch(key, frames, frame_ids=None, **kwargs):
+    """Run the shared model on several frames in one ``predict`` call.
+
+    Returns one entry per frame, shaped like ``predict()``'s return value (or
+    None if the model is unavailable). With ``frame_ids``, frames already in
+    the frame cache are skipped and the new results are cached, so a later
+    ``predict()`` with the same arguments on one of these frames is free.
+    """
+    key = model_key(key)
+    model = get_model(key)
+    if model is None:
+        return [None] * len(frames)
+    if frame_ids is None:
+        frame_ids = [None] * len(frames)
+    call_key = (key, tuple(sorted(kwargs.items())))
+    frame_cache.reserve(len(frames))
+
+    results = [frame_cache.get(frame_id, call_key) for frame_id in frame_ids]
+    missing = [i for i, result in enumerate(results) if result is None]
+    if missing:
+        batch = model.predict([frames[i] for i in missing], **kwargs)
+        for i, result in zip(missing, batch):
+            results[i] = [result]
+            frame_cache.put(frame_ids[i], call_key, results[i])
+    return results
+
+
+def release_model(key):
+    """Drop one reference; the model is unloaded when nobody holds it"""
+    entry = _get_entry(key)
+    with _registry_lock:
+        entry.refcount = max(0, entry.refcount - 1)
+        if entry.refcount > 0:
+            return
+    unload_model(entry.key)
+
+
+def unload_model(key):
+    """Free a model immediately, regardless of outstanding references"""
+    key = model_key(key)
+    with _registry_lock:
+        entry = _entries.get(key)
+    if entry is None:
+        return
+    with entry.load_lock:
+        if entry.model is not None:
+            print(f"[model_registry] {os.path.basename(key.path)} unloaded.")
+        entry.model = None
+        entry.loaded_as = None
+        entry.failed = False
+
+
+def unload_all():
+    with _registry_lock:
+        keys = list(_entries)
+    for key in keys:
+        unload_model(key)
+
+
+def loaded_models():
+    """Return {key: refcount} for every model currently in memory"""
+    with _registry_lock:
+        return {k: e.refcount for k, e in _entries.items() if e.model is not None}
@@ -0,0 +1,105 @@
+"""
+Change detection in front of the mode handlers, and the idle state
+
+Each frame is shrunk to a small grayscale thumbnail and compared with the
+last frame that was let through. Inference only runs when the view changed
+(or shortly after it did), and after a long stretch with no change and no
+user input the assistant is reported idle so the caller can drop its frame
+rate until something wakes it.
+"""
+
+import threading
+import time
+
+import cv2
+import numpy as np
+
+
+class MotionGate:
+    """Decide per frame whether the scene changed enough to run inference"""
+
+    def __init__(self, threshold=4.0, size=(64, 48), hold_seconds=3.0,
+                 idle_after=60.0, idle_fps=2.0):
+        """
+        threshold: mean absolute gray-level difference of the thumbnails that
+            counts as a change
+        hold_seconds: keep passing frames this long after a change, so
+            handlers with announcement cooldowns still see the settled scene
+        idle_after: seconds without change or input before going idle
+            (0 disables the idle state)
+        idle_fps: frame rate to run at while idle
+        """
+        self.threshold = threshold
+        self.size = size
+        self.hold_seconds = hold_seconds
+        self.idle_after = idle_after
+        self.idle_fps = idle_fps
+        self.passed = 0
+        self.skipped = 0
+        self.idle = False
+        self._reference = None
+        self._last_change = time.time()
+        self._last_activity = self._last_change
+        self._lock = threading.Lock()
+
+    def _thumbnail(self, frame):
+        gray = frame if frame.ndim == 2 else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        small = cv2.resize(gray, self.size, interpolation=cv2.INTER_AREA)
+        return cv2.GaussianBlur(small, (3, 3), 0).astype(np.int16)
+
+    def prime(self, frame):
+        """Use ``frame`` as the reference, e.g. a background frame taken at startup"""
+        with self._lock:
+            self._reference = self._thumbnail(frame)
+            self._last_change = time.time()
+
+    def reset(self):
+        """Let the next frames through, e.g. after a mode switch"""
+        with self._lock:
+            self._reference = None
+        self.wake("reset")
+
+    def difference(self, frame):
+        """Mean thumbnail difference from the reference (inf without one)"""
+        if self._reference is None:
+            return float("inf")
+        return float(np.mean(np.abs(self._thumbnail(frame) - self._reference)))
+
+    def changed(self, frame):
+        """True if inference should run on ``frame``; updates the idle state"""
+        now = time.time()
+        with self._lock:
+            thumbnail = self._thumbnail(frame)
+            moved = (self._reference is None
+                     or float(np.mean(np.abs(thumbnail - self._reference))) > self.threshold)
+            if moved:
+                self._reference = thumbnail
+                self._last_change = now
+                self._last_activity = now
+            run = moved or now - self._last_change < self.hold_seconds
+            if run:
+                self.passed += 1
+            else:
+                self.skipped += 1
+        if moved and self.idle:
+            self._set_idle(False, "motion")
+        elif not moved and not self.idle and self.idle_after and now - self._last_activity > self.idle_after:
+            self._set_idle(True, "no change")
+        return run
+
+    def wake(self, reason="input"):
+        """Count user input (key, voice) as activity and leave the idle state"""
+        with self._lock:
+            self._last_activity = time.time()
+            self._last_change = self._last_activity
+        if self.idle:
+            self._set_idle(False, reason)
+
+    def frame_interval(self):
+        """Seconds to wait between frames: 0 when active, 1 / idle_fps when idle"""
+        return 1.0 / self.idle_fps if self.idle and self.idle_fps else 0.0
+
+    def _set_idle(self, idle, reason):
+        self.idle = idle
+        state = "idle (low frame rate)" if idle else "active"
+        print(f"[motion_gate] {state}: {reason}")
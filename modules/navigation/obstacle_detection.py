@@ -1,11 +1,18 @@
 import cv2
-from ultralytics import YOLO
+from modules import model_registry
 from modules.tts_engine import speak_text
 
-model = YOLO("models/yolov8n.pt")  # use your trained or default YOLOv8 model
+MODEL_NAME = "yolov8n.pt"  # use your trained or default YOLOv8 model
 
 def detect_obstacles_realtime():
     """Detect obstacles and give warnings."""
+    model_key = model_registry.acquire_model(MODEL_NAME)
+    model = model_registry.get_model(model_key)
+    if model is None:
+        model_registry.release_model(model_key)
+        speak_text("Obstacle detection is not available.")
+        return
+
     cap = cv2.VideoCapture(0)
     obstacle_detected = False
 
@@ -30,3 +37,4 @@ def detect_obstacles_realtime():
 
     cap.release()
     cv2.destroyAllWindows()
+    model_registry.release_model(model_key)
@@ -1,55 +1,151 @@
 import cv2
-import os
+import threading
 import numpy as np
-from ultralytics import YOLO
+from modules import model_registry
 
-_models_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), "models")
-_model_path = os.path.join(_models_dir, "yolov8n.pt")  # Using yolov8n.pt
+MODEL_NAME = "yolov8n.pt"
+# "torch", "onnx" or "openvino"; None uses model_registry.DEFAULT_BACKEND
+BACKEND = model_registry.env_choice("VISO_OBJECT_BACKEND", model_registry.BACKENDS)
+# "fp32" or "int8"; None uses model_registry.DEFAULT_PRECISION. Callers can
+# also ask for a precision per call, e.g. INT8 for navigation only.
+PRECISION = model_registry.env_choice("VISO_OBJECT_PRECISION", model_registry.PRECISIONS)
 
-_yolo_ready = False
-_model = None
+_model_keys = {None: model_registry.acquire_model(MODEL_NAME, BACKEND, PRECISION)}
+_model_keys_lock = threading.Lock()
 
-if os.path.isfile(_model_path):
-    try:
-        _model = YOLO(_model_path)
-        _yolo_ready = True
-        print("[object_detector] YOLOv8 loaded.")
-    except Exception as e:
-        print(f"[object_detector] YOLO load failed: {e}")
-else:
-    print("[object_detector] YOLOv8 model not found in 'models/'. Fallback active.")
-
-def detect_objects_in_frame(frame, conf_threshold=0.5, nms_threshold=0.4):
+def _model_key(precision=None):
+    with _model_keys_lock:
+        key = _model_keys.get(precision)
+        if key is None:
+            key = _model_keys[precision] = model_registry.acquire_model(MODEL_NAME, BACKEND, precision)
+        return key
+
+def _get_model(precision=None):
+    return model_registry.get_model(_model_key(precision))
+
+def warm_up(precision=None):
+    """Load YOLOv8 ahead of the first frame"""
+    return _get_model(precision) is not None
+
+class Detections:
+    """Columnar YOLO detections for one frame.
+
+    Boxes are kept as an (N, 4) int array of (x, y, w, h) next to confidence
+    and class-id arrays. It still behaves like the old list of
+    {'label', 'confidence', 'box'} dicts (len, iteration, indexing, slicing),
+    but a dict is only built for the detections that are actually read.
+    """
+
+    def __init__(self, boxes, confidences, class_ids, names):
+        self.boxes = boxes
+        self.confidences = confidences
+        self.class_ids = class_ids
+        self.names = names
+
+    @classmethod
+    def empty(cls, names=None):
+        return cls(np.zeros((0, 4), dtype=np.int32), np.zeros(0, dtype=np.float32),
+                   np.zeros(0, dtype=np.int32), names or {})
+
+    @classmethod
+    def from_results(cls, results, names):
+        """Build from ultralytics results, moving each boxes tensor to NumPy once"""
+        xyxy, conf, class_ids = [], [], []
+        for result in results or []:
+            boxes = result.boxes
+            if boxes is None or len(boxes) == 0:
+                continue
+            data = boxes.data.cpu().numpy()  # x1, y1, x2, y2, [track id,] conf, cls
+            xyxy.append(data[:, :4])
+            conf.append(data[:, -2])
+            class_ids.append(data[:, -1])
+        if not xyxy:
+            return cls.empty(names)
+
+        xyxy = np.concatenate(xyxy)
+        boxes = np.empty((len(xyxy), 4), dtype=np.int32)
+        boxes[:, :2] = xyxy[:, :2]
+        boxes[:, 2:] = xyxy[:, 2:] - xyxy[:, :2]
+        return cls(boxes, np.concatenate(conf).astype(np.float32),
+                   np.concatenate(class_ids).astype(np.int32), names)
+
+    @property
+    def labels(self):
+        return [self.names[c] for c in self.class_ids.tolist()]
+
+    @property
+    def areas(self):
+        return self.boxes[:, 2].astype(np.int64) * self.boxes[:, 3]
+
+    def select(self, index):
+        """Subset by boolean mask or index array"""
+        return Detections(self.boxes[index], self.confidences[index], self.class_ids[index], self.names)
+
+    def with_labels(self, labels):
+        wanted = [c for c, name in self.names.items() if name in labels]
+        return self.select(np.isin(self.class_ids, wanted))
+
+    def largest(self, n=None):
+        order = np.argsort(-self.areas, kind="stable")
+        return self.select(order[:n])
+
+    def _as_dict(self, i):
+        x, y, w, h = self.boxes[i].tolist()
+        return {
+            "label": self.names[int(self.class_ids[i])],
+            "confidence": float(self.confidences[i]),
+            "box": (x, y, w, h)
+        }
+
+    def to_dicts(self):
+        return [self._as_dict(i) for i in range(len(self))]
+
+    def __len__(self):
+        return len(self.class_ids)
+
+    def __bool__(self):
+        return len(self) > 0
+
+    def __iter__(self):
+        return (self._as_dict(i) for i in range(len(self)))
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.select(index)
+        return self._as_dict(range(len(self))[index])
+
+
+def detect_objects_in_frame(frame, conf_threshold=0.5, nms_threshold=0.4, frame_id=None, precision=None,
+                            imgsz=None):
     """
-    Returns: [{'label': str, 'confidence': float, 'box': (x,y,w,h)}]
+    frame_id: capture sequence number; callers passing the same id share one YOLO pass
+    precision: "fp32" or "int8" to override PRECISION for this call
+    imgsz: YOLO input size for this call; None keeps the model default
+    Returns: Detections, a list-like of {'label': str, 'confidence': float, 'box': (x,y,w,h)}
     """
-    results = []
-    if not _yolo_ready:
-        return results
-
-    # Run YOLOv8 inference
-    results_yolo = _model.predict(frame, conf=conf_threshold, iou=nms_threshold)
-
-    for result in results_yolo:
-        boxes = result.boxes
-        for box in boxes:
-            x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
-            conf = box.conf[0].cpu().numpy()
-            cls = int(box.cls[0].cpu().numpy())
-            label = _model.names[cls]
-
-            # Convert to (x, y, w, h)
-            x = int(x1)
-            y = int(y1)
-            w = int(x2 - x1)
-            h = int(y2 - y1)
-
-            results.append({
-                "label": label,
-                "confidence": float(conf),
-                "box": (x, y, w, h)
-            })
-    return results
+    model_key = _model_key(precision)
+    model = model_registry.get_model(model_key)
+    if model is None:
+        return Detections.empty()
+
+    options = {}
+    if imgsz and model_registry.accepts_imgsz(model_key):
+        options["imgsz"] = imgsz
+    # Run YOLOv8 inference (reused if this frame was already run)
+    results_yolo = model_registry.predict(model_key, frame, frame_id,
+                                          conf=conf_threshold, iou=nms_threshold, **options)
+    return Detections.from_results(results_yolo, model.names)
+
+def detect_objects_in_frames(frames, conf_threshold=0.5, nms_threshold=0.4, frame_ids=None, precision=None):
+    """Batched detect_objects_in_frame: one YOLO call for all frames, one Detections per frame"""
+    model_key = _model_key(precision)
+    model = model_registry.get_model(model_key)
+    if model is None:
+        return [Detections.empty() for _ in frames]
+
+    batch = model_registry.predict_batch(model_key, frames, frame_ids,
+                                         conf=conf_threshold, iou=nms_threshold)
+    return [Detections.from_results(results, model.names) for results in batch]
 
 def draw_detections(frame, detections, show_conf=True):
     for d in detections:
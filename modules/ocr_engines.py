@@ -0,0 +1,178 @@
+"""
+Run several OCR engines on the same image concurrently
+
+Each engine gets its own single-thread executor, so engines run in parallel
+with each other while calls into one engine stay serialized (EasyOCR and the
+Tesseract API are not safe to call from several threads at once). Engines are
+functions ``image -> [(word, confidence), ...]`` with confidences in 0..1.
+
+Policies:
+    "first"  the first engine to return words at a mean confidence of at
+             least ``min_confidence`` wins; the others are not waited for, so
+             an EasyOCR miss costs max(latencies), not their sum. If no
+             engine is that sure, the most confident reading wins
+    "merge"  wait for every engine (within its timeout) and merge the word
+             sequences, keeping the more confident reading where they differ
+
+An engine that overruns its timeout is left to finish in the background and
+skipped until it does, so a stuck engine never queues up work.
+"""
+
+import difflib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+POLICIES = ("first", "merge")
+
+
+def _mean_confidence(words):
+    return sum(c for _, c in words) / len(words) if words else 0.0
+
+
+def merge_words(a, b, keep_unmatched=0.6):
+    """Merge two word sequences read from the same image.
+
+    Words both engines agree on are kept once (spelled as the more confident
+    engine read them); where they disagree the span with the higher mean
+    confidence wins; words only one engine saw are kept if their mean
+    confidence reaches ``keep_unmatched``.
+    """
+    matcher = difflib.SequenceMatcher(None, [w.lower() for w, _ in a], [w.lower() for w, _ in b],
+                                      autojunk=False)
+    merged = []
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        span_a, span_b = a[i1:i2], b[j1:j2]
+        if tag == "equal":
+            merged += [wa if wa[1] >= wb[1] else wb for wa, wb in zip(span_a, span_b)]
+        elif tag == "replace":
+            merged += span_a if _mean_confidence(span_a) >= _mean_confidence(span_b) else span_b
+        else:
+            span = span_a or span_b
+            if _mean_confidence(span) >= keep_unmatched:
+                merged += span
+    return merged
+
+
+class OCREngineExecutor:
+    """Run OCR engines concurrently and combine their words by ``policy``"""
+
+    def __init__(self, engines, policy="first", timeouts=None, default_timeout=5.0,
+                 min_confidence=0.6):
+        """
+        engines: ordered {name: callable(image) -> [(word, confidence)]};
+            the order breaks ties, earlier engines are preferred
+        timeouts: {name: seconds} per engine, ``default_timeout`` otherwise
+        min_confidence: mean word confidence an early reading needs to win
+            under the "first" policy without waiting for the other engines
+        """
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown OCR policy: {policy} (choose from {', '.join(POLICIES)})")
+        self.engines = dict(engines)
+        self.policy = policy
+        self.timeouts = dict(timeouts or {})
+        self.default_timeout = default_timeout
+        self.min_confidence = min_confidence
+        self.stats = {name: {"runs": 0, "wins": 0, "empty": 0, "errors": 0, "timeouts": 0, "skipped": 0}
+                      for name in self.engines}
+        self._executors = {}
+        self._busy = {}
+        self._lock = threading.Lock()
+
+    def _executor(self, name):
+        with self._lock:
+            if name not in self._executors:
+                self._executors[name] = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"OCR-{name}")
+            return self._executors[name]
+
+    def _submit(self, name, image):
+        """Start ``name`` on ``image``; None if it is still busy with an overrun call"""
+        with self._lock:
+            busy = self._busy.get(name)
+            if busy is not None and not busy.done():
+                self.stats[name]["skipped"] += 1
+                return None
+        future = self._executor(name).submit(self.engines[name], image)
+        with self._lock:
+            self._busy[name] = future
+            self.stats[name]["runs"] += 1
+        return future
+
+    def _collect(self, name, future):
+        """Words from a finished future, or None if the engine raised"""
+        try:
+            words = [(w, float(c)) for w, c in future.result() if w and w.strip()]
+        except Exception as e:
+            print(f"[ocr_engines] {name} failed: {e}")
+            self.stats[name]["errors"] += 1
+            return None
+        if not words:
+            self.stats[name]["empty"] += 1
+        return words
+
+    def run(self, image, policy=None, engines=None):
+        """Words read from ``image``, or None if every engine failed or timed out.
+
+        ``engines`` restricts the run to some of the configured engines.
+        """
+        policy = policy or self.policy
+        names = [n for n in (engines or self.engines) if n in self.engines]
+        started = time.monotonic()
+        pending = {}
+        for name in names:
+            future = self._submit(name, image)
+            if future is not None:
+                pending[future] = name
+
+        results = {}
+        while pending:
+            now = time.monotonic()
+            for future, name in list(pending.items()):
+                if not future.done() and now - started >= self.timeouts.get(name, self.default_timeout):
+                    print(f"[ocr_engines] {name} timed out")
+                    self.stats[name]["timeouts"] += 1
+                    del pending[future]
+            if not pending:
+                break
+            deadline = min(self.timeouts.get(n, self.default_timeout) for n in pending.values())
+            done, _ = wait(pending, timeout=max(0.0, started + deadline - time.monotonic()),
+                           return_when=FIRST_COMPLETED)
+            for future in done:
+                name = pending.pop(future)
+                results[name] = self._collect(name, future)
+                if (policy == "first" and results[name]
+                        and _mean_confidence(results[name]) >= self.min_confidence):
+                    self.stats[name]["wins"] += 1
+                    return results[name]
+
+        answered = [n for n in names if results.get(n) is not None]
+        if not answered:
+            return None
+        if policy == "first":
+            found = [n for n in answered if results[n]]
+            if not found:
+                # Nobody found text; report an empty reading rather than a failure
+                return []
+            # No engine was sure enough to win early; take the most confident
+            best = max(found, key=lambda n: (_mean_confidence(results[n]), -names.index(n)))
+            self.stats[best]["wins"] += 1
+            return results[best]
+        merged = []
+        for name in answered:
+            merged = merge_words(merged, results[name]) if merged else results[name]
+        if merged:
+            for name in answered:
+                if results[name]:
+                    self.stats[name]["wins"] += 1
+        return merged
+
+    def read_text(self, image, policy=None, engines=None):
+        """``run`` joined into a string (None if every engine failed)"""
+        words = self.run(image, policy, engines)
+        return None if words is None else " ".join(w for w, _ in words)
+
+    def shutdown(self):
+        with self._lock:
+            executors, self._executors = list(self._executors.values()), {}
+        for executor in executors:
+            executor.shutdown(wait=False)
@@ -4,29 +4,147 @@ OCR Reader module for text detection and recognition
 
 import cv2
 import numpy as np
-import pytesseract
-import easyocr
-from PIL import Image
 import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from modules.utils import clean_text, validate_image_format, limit_text_length
+from modules.incremental_ocr import IncrementalOCR
+from modules.ocr_engines import OCREngineExecutor, POLICIES
+from modules.tesseract_engine import TesseractEngine
+from modules.tiled_ocr import read_tiled
 
-# -------------------- Windows Tesseract path --------------------
-# Update this path if your Tesseract is installed elsewhere
-pytesseract.pytesseract.tesseract_cmd = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
+# Images with more pixels than this (e.g. 12 MP page photos) are read tile by tile
+TILE_MIN_PIXELS = 4_000_000
+
+def thumbnail(image, width=160):
+    """Gray copy of ``image`` shrunk to ``width`` px wide, as int16.
+
+    At 160 px a 640 px frame is averaged over 4x4 cells: enough to smooth
+    sensor noise (a few gray levels), not enough to hide a changed glyph,
+    which moves some cell by tens of levels.
+    """
+    gray = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    height = max(1, round(gray.shape[0] * width / gray.shape[1]))
+    return cv2.resize(gray, (width, height), interpolation=cv2.INTER_AREA).astype(np.int16)
+
+class OCRResultCache:
+    """LRU cache of OCR text keyed by a thumbnail of the image that was read.
+
+    A lookup hits only when every cell of a cached thumbnail of the same
+    kind is within ``max_difference`` gray levels, so a steady page is OCR'd
+    once but a page where a single character changed (a price, a dosage) is
+    read again.
+    """
+
+    def __init__(self, capacity=32, max_difference=24, width=160):
+        self.capacity = capacity
+        self.max_difference = max_difference
+        self.width = width
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def lookup(self, kind, thumb):
+        with self._lock:
+            key = (kind, thumb.shape, thumb.tobytes())
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key][1]
+            for entry_key, (entry_thumb, text) in reversed(self._entries.items()):
+                if (entry_key[0] == kind and entry_thumb.shape == thumb.shape
+                        and int(np.abs(entry_thumb - thumb).max()) <= self.max_difference):
+                    self._entries.move_to_end(entry_key)
+                    self.hits += 1
+                    self.near_hits += 1
+                    return text
+            self.misses += 1
+            return None
+
+    def store(self, kind, thumb, text):
+        with self._lock:
+            key = (kind, thumb.shape, thumb.tobytes())
+            self._entries[key] = (thumb, text)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+
+    def get_or_compute(self, kind, image, compute):
+        """Cached text for ``image``, or ``compute()`` stored under its thumbnail.
+
+        ``kind`` keeps results of different OCR paths apart. None results
+        (engine failures) are not cached.
+        """
+        if self.capacity <= 0:
+            return compute()
+        thumb = thumbnail(image, self.width)
+        text = self.lookup(kind, thumb)
+        if text is None:
+            text = compute()
+            if text is not None:
+                self.store(kind, thumb, text)
+        return text
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {"hits": self.hits, "near_hits": self.near_hits, "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "entries": len(self._entries)}
 
 class OCRReader:
-    def __init__(self):
-        """Initialize OCR reader with multiple engines"""
-        self.tesseract_config = '--oem 3 --psm 11'
-        self.easyocr_reader = None
+    def __init__(self, policy="first", timeouts=None):
+        """Initialize OCR reader with multiple engines.
 
-        # Try EasyOCR
-        try:
-            self.easyocr_reader = easyocr.Reader(['en'])
-            print("[OCRReader] EasyOCR initialized successfully")
-        except Exception as e:
-            print(f"[OCRReader] EasyOCR initialization failed: {e}")
-            print("[OCRReader] Falling back to Tesseract only")
+        policy: how the concurrently run engines are combined, "first"
+            (first engine with text wins) or "merge" (word-level merge)
+        timeouts: per-engine seconds, e.g. {"easyocr": 5.0, "tesseract": 3.0}
+        """
+        # Persistent in-process handle when tesserocr is installed
+        self.tesseract = TesseractEngine(psm=11, oem=3)
+        self.result_cache = OCRResultCache()
+        # EasyOCR is listed first so it wins ties, as when it ran first
+        self.engines = OCREngineExecutor({"easyocr": self._easyocr_words, "tesseract": self.tesseract.words},
+                                         policy=policy,
+                                         timeouts=timeouts or {"easyocr": 5.0, "tesseract": 3.0})
+        self._easyocr_reader = None
+        self._easyocr_attempted = False
+        self._easyocr_lock = threading.Lock()
+        # Serializes EasyOCR calls made from the tiled OCR threads
+        self._easyocr_call_lock = threading.Lock()
+        # Tiled OCR threads live as long as the reader, so each Tesseract
+        # handle they open is reused instead of leaked on every read
+        self._tile_pool = None
+        self._tile_pool_lock = threading.Lock()
+
+    @property
+    def easyocr_reader(self):
+        """EasyOCR reader, built on first use so importing this module stays cheap"""
+        if self._easyocr_attempted:
+            return self._easyocr_reader
+
+        with self._easyocr_lock:
+            if self._easyocr_attempted:
+                return self._easyocr_reader
+            try:
+                import easyocr
+                self._easyocr_reader = easyocr.Reader(['en'])
+                print("[OCRReader] EasyOCR initialized successfully")
+            except Exception as e:
+                print(f"[OCRReader] EasyOCR initialization failed: {e}")
+                print("[OCRReader] Falling back to Tesseract only")
+            self._easyocr_attempted = True
+        return self._easyocr_reader
+
+    def warm_up(self):
+        """Load the OCR engines ahead of the first frame"""
+        return self.easyocr_reader is not None
 
     def read_text_from_image(self, image_path, preprocess=True):
         if not os.path.exists(image_path):
@@ -35,9 +153,12 @@ class OCRReader:
             return "Unsupported image format"
 
         try:
-            image = cv2.imread(image_path)
+            # OCR works on gray anyway; loading gray keeps big photos a third the size
+            image = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE)
             if image is None:
                 return "Failed to load image"
+            if image.shape[0] * image.shape[1] > TILE_MIN_PIXELS:
+                return self.read_text_tiled(image, preprocess)
             return self.read_text_from_frame(image, preprocess)
         except Exception as e:
             return f"Error reading image: {str(e)}"
@@ -52,37 +173,104 @@ class OCRReader:
             else:
                 processed_frame = frame
 
-            text = ""
+            # A near-identical image (same page, camera steady) reuses the last text
+            text = self.result_cache.get_or_compute(("frame", preprocess), processed_frame,
+                                                    lambda: self._read_processed(processed_frame))
+            return text or ""
 
-            # --- EasyOCR first ---
-            if self.easyocr_reader:
-                try:
-                    results = self.easyocr_reader.readtext(processed_frame)
-                    easyocr_text = " ".join([r[1] for r in results if r[2] > 0.5])
-                    if easyocr_text.strip():
-                        text = easyocr_text
-                except Exception as e:
-                    print(f"[OCRReader] EasyOCR failed: {e}")
+        except Exception as e:
+            print(f"[OCRReader] Error in OCR processing: {e}")
+            return ""
 
-            # --- Tesseract fallback ---
-            if not text.strip():
+    def _read_processed(self, processed_frame):
+        """OCR an already preprocessed image; None if every engine failed"""
+        # EasyOCR and Tesseract run side by side, so an EasyOCR miss no
+        # longer waits for Tesseract to start afterwards
+        engines = None if self.easyocr_reader else ["tesseract"]
+        text = self.engines.read_text(processed_frame, engines=engines)
+        if text is None:
+            return None
+
+        cleaned_text = clean_text(text)
+        return limit_text_length(cleaned_text, max_length=500)
+
+    def _easyocr_words(self, image):
+        words = []
+        for _, text, confidence in self.easyocr_reader.readtext(image):
+            if confidence > 0.5:
+                words += [(word, confidence) for word in text.split()]
+        return words
+
+    def read_text_from_frames(self, frames, preprocess=True):
+        """read_text_from_frame for several frames, batching EasyOCR by frame size"""
+        processed = [None if frame is None or frame.size == 0
+                     else self._preprocess_image(frame) if preprocess else frame
+                     for frame in frames]
+        texts = [""] * len(frames)
+
+        # --- EasyOCR first, one batched call per image size ---
+        if self.easyocr_reader:
+            by_shape = {}
+            for i, image in enumerate(processed):
+                if image is not None:
+                    by_shape.setdefault(image.shape, []).append(i)
+            for indices in by_shape.values():
                 try:
-                    pil_image = Image.fromarray(cv2.cvtColor(processed_frame, cv2.COLOR_BGR2RGB))
-                    tesseract_text = pytesseract.image_to_string(pil_image, config=self.tesseract_config)
-                    text = tesseract_text
+                    batch = self.easyocr_reader.readtext_batched([processed[i] for i in indices])
                 except Exception as e:
-                    print(f"[OCRReader] Tesseract failed: {e}")
-                    return ""
+                    print(f"[OCRReader] EasyOCR batch failed: {e}")
+                    continue
+                for i, results in zip(indices, batch):
+                    texts[i] = " ".join([r[1] for r in results if r[2] > 0.5])
+
+        # --- Tesseract fallback for frames EasyOCR found nothing in ---
+        for i, image in enumerate(processed):
+            if image is None or texts[i].strip():
+                continue
+            try:
+                texts[i] = self.tesseract.read_text(image)
+            except Exception as e:
+                print(f"[OCRReader] Tesseract failed: {e}")
+
+        return [limit_text_length(clean_text(text), max_length=500) for text in texts]
 
-            cleaned_text = clean_text(text)
-            return limit_text_length(cleaned_text, max_length=500)
+    def read_text_tiled(self, image, preprocess=True, tile=1280, overlap=192, workers=None):
+        """OCR a large image as overlapping tiles in parallel; lines joined by newlines.
 
+        Tiles are read with Tesseract, which runs one engine per thread, or
+        with EasyOCR one tile at a time if Tesseract is not installed.
+        """
+        if image is None or image.size == 0:
+            return ""
+        workers = workers or min(4, os.cpu_count() or 1)
+        with self._tile_pool_lock:
+            # Sized by the first tiled read
+            if self._tile_pool is None:
+                self._tile_pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="TiledOCR")
+            pool = self._tile_pool
+        use_tesseract = self.tesseract.available or self.easyocr_reader is None
+
+        def recognize(tile_image):
+            if preprocess:
+                tile_image = self._preprocess_image(tile_image)
+            if use_tesseract:
+                return self.tesseract.word_boxes(tile_image)
+            with self._easyocr_call_lock:
+                results = self.easyocr_reader.readtext(tile_image)
+            return [(text, confidence,
+                     (int(min(p[0] for p in box)), int(min(p[1] for p in box)),
+                      int(max(p[0] for p in box)), int(max(p[1] for p in box))))
+                    for box, text, confidence in results if confidence > 0.5]
+
+        try:
+            lines = read_tiled(image, recognize, tile=tile, overlap=overlap, workers=workers, pool=pool)
         except Exception as e:
-            print(f"[OCRReader] Error in OCR processing: {e}")
+            print(f"[OCRReader] Tiled OCR failed: {e}")
             return ""
+        return "\n".join(lines)
 
     def _preprocess_image(self, image):
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        gray = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
         # Slight sharpening
         kernel = np.array([[0, -1, 0], [-1, 5,-1], [0,-1,0]])
         sharp = cv2.filter2D(gray, -1, kernel)
@@ -95,8 +283,11 @@ class OCRReader:
 
         try:
             if self.easyocr_reader:
-                results = self.easyocr_reader.readtext(frame)
-                return [r[0] for r in results if r[2] > 0.3]
+                # Detection stage only; recognition is not needed for boxes
+                horizontal, free = self.easyocr_reader.detect(frame)
+                regions = [[(x0, y0), (x1, y0), (x1, y1), (x0, y1)] for x0, x1, y0, y1 in horizontal[0]]
+                regions += [[tuple(p) for p in poly] for poly in free[0]]
+                return regions
 
             gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
             edges = cv2.Canny(gray, 100, 200)
@@ -114,16 +305,68 @@ class OCRReader:
             print(f"[OCRReader] Error detecting text regions: {e}")
             return []
 
-# Global OCR instance
-ocr_reader = OCRReader()
+# "first" or "merge"; read from the environment so spawned worker processes
+# use the same policy as the app that started them
+POLICY = os.environ.get("VISO_OCR_POLICY", "first")
+if POLICY not in POLICIES:
+    print(f"[OCRReader] Ignoring unknown VISO_OCR_POLICY={POLICY!r}, using 'first'")
+    POLICY = "first"
+
+# Global OCR instance (engines are loaded lazily)
+ocr_reader = OCRReader(policy=POLICY)
+
+# Tracks the page in document mode so only changed lines are re-read
+document_ocr = IncrementalOCR(ocr_reader)
+# Scale the last document frame was read at
+_document_scale = 1.0
+
+def _downscale(frame, scale):
+    if scale >= 1.0:
+        return frame
+    return cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+def warm_up():
+    return ocr_reader.warm_up()
 
 # Convenience functions
 def read_text_from_image(image_path, preprocess=True):
     return ocr_reader.read_text_from_image(image_path, preprocess)
 
-def read_text_from_frame(frame, preprocess=True):
+def read_text_from_frame(frame, preprocess=True, scale=1.0):
+    if frame is not None and frame.size:
+        frame = _downscale(frame, scale)
     return ocr_reader.read_text_from_frame(frame, preprocess)
 
+def read_text_from_frames(frames, preprocess=True):
+    return ocr_reader.read_text_from_frames(frames, preprocess)
+
+def read_text_tiled(image, preprocess=True):
+    return ocr_reader.read_text_tiled(image, preprocess)
+
+def read_document_lines(frame, scale=1.0):
+    """Lines of text in a document frame, top to bottom.
+
+    scale: shrink the frame by this factor first, trading accuracy for speed
+    """
+    global _document_scale
+    if frame is None or frame.size == 0:
+        return []
+    if scale != _document_scale:
+        # Tracked boxes are in pixels of the old size
+        _document_scale = scale
+        document_ocr.reset()
+    frame = _downscale(frame, scale)
+    # Steady page: skip tracking and recognition entirely
+    processed = ocr_reader._preprocess_image(frame)
+    return ocr_reader.result_cache.get_or_compute("document", processed,
+                                                  lambda: tuple(document_ocr.read_lines(frame)))
+
+def read_document_text(frame):
+    return limit_text_length(" ".join(read_document_lines(frame)), max_length=500)
+
+def reset_document_tracking():
+    document_ocr.reset()
+
 def detect_text_regions(frame):
     return ocr_reader.detect_text_regions(frame)
 
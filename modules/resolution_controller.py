@@ -0,0 +1,118 @@
+"""
+Per-mode input resolution chosen from measured latency
+
+Each mode has a latency budget. The controller keeps the last few model
+latencies of every mode and moves one step down the resolution ladder when
+they run over budget, or one step up when the next step is predicted to fit
+(latency grows roughly with pixel count, i.e. with the square of the size).
+Detector modes get a YOLO ``imgsz``; OCR modes get a downscale factor for
+the image (or ROI) handed to OCR. Every mode starts at full resolution.
+"""
+
+import threading
+from collections import deque
+
+# Model latency each mode should stay under, in ms
+DEFAULT_BUDGETS_MS = {
+    "navigation": 150,
+    "currency": 300,
+    "objects": 250,
+    "scene": 400,
+    "document": 1000,
+}
+
+# Modes whose resolution is an OCR downscale factor rather than a YOLO imgsz
+OCR_MODES = ("document",)
+
+# YOLO input sizes (multiples of the 32 px stride), smallest first
+IMGSZ_STEPS = (256, 320, 416, 512, 640)
+OCR_SCALES = (0.5, 0.6, 0.75, 0.9, 1.0)
+
+
+class ResolutionController:
+    """Pick each mode's detector imgsz / OCR scale against its latency budget"""
+
+    def __init__(self, budgets=None, window=8, percentile=0.75, margin=0.85,
+                 imgsz_steps=IMGSZ_STEPS, ocr_scales=OCR_SCALES):
+        """
+        window: latencies measured at a setting before it is re-evaluated
+        percentile: which of those latencies is compared with the budget
+        margin: step up only if the predicted latency is below this
+            fraction of the budget, so the setting does not flip-flop
+        """
+        self.budgets = dict(DEFAULT_BUDGETS_MS)
+        self.budgets.update(budgets or {})
+        self.window = window
+        self.percentile = percentile
+        self.margin = margin
+        self.imgsz_steps = tuple(imgsz_steps)
+        self.ocr_scales = tuple(ocr_scales)
+        self._levels = {}
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def _steps(self, mode):
+        return self.ocr_scales if mode in OCR_MODES else self.imgsz_steps
+
+    def _value(self, mode):
+        steps = self._steps(mode)
+        return steps[self._levels.get(mode, len(steps) - 1)]
+
+    def imgsz(self, mode):
+        """YOLO input size for ``mode``, or None if it is not a detector mode with a budget"""
+        if mode not in self.budgets or mode in OCR_MODES:
+            return None
+        return self._value(mode)
+
+    def ocr_scale(self, mode):
+        """Factor to shrink ``mode``'s OCR input by (1.0 = full resolution)"""
+        if mode not in self.budgets or mode not in OCR_MODES:
+            return 1.0
+        return self._value(mode)
+
+    def record(self, mode, latency_ms):
+        """Add one measured model latency for ``mode`` and adjust its resolution"""
+        budget = self.budgets.get(mode)
+        if budget is None:
+            return
+        with self._lock:
+            samples = self._samples.setdefault(mode, deque(maxlen=self.window))
+            samples.append(latency_ms)
+            if len(samples) < self.window:
+                return
+            typical = sorted(samples)[int(self.percentile * (len(samples) - 1))]
+            steps = self._steps(mode)
+            level = self._levels.get(mode, len(steps) - 1)
+            if typical > budget and level > 0:
+                level -= 1
+            elif level < len(steps) - 1:
+                predicted = typical * (steps[level + 1] / steps[level]) ** 2
+                if predicted >= budget * self.margin:
+                    return
+                level += 1
+            else:
+                return
+            self._levels[mode] = level
+            # Measure the new setting from scratch
+            samples.clear()
+        print(f"[resolution] {mode}: {typical:.0f} ms against a {budget:g} ms budget, "
+              f"now {self.describe(mode)}")
+
+    def describe(self, mode):
+        if mode in OCR_MODES:
+            return f"OCR scale {self.ocr_scale(mode):g}"
+        return f"imgsz {self.imgsz(mode)}"
+
+    def settings(self):
+        """{mode: imgsz or OCR scale} for every mode with a budget"""
+        return {mode: self.ocr_scale(mode) if mode in OCR_MODES else self.imgsz(mode)
+                for mode in self.budgets}
+
+
+def parse_budget(text):
+    """Parse a ``MODE=MS`` command-line value into (mode, ms)"""
+    mode, _, ms = text.partition("=")
+    try:
+        return mode.strip(), float(ms)
+    except ValueError:
+        raise ValueError(f"Expected MODE=MS, got {text!r}")
@@ -0,0 +1,134 @@
+"""
+On-demand sampling profiler for the running assistant
+
+While active, a background thread snapshots every thread's Python stack at a
+fixed interval (``sys._current_frames``) and counts identical stacks. When
+the sampling window ends it writes a collapsed-stack file (one
+``thread;outer;...;inner count`` line per stack, the input format of
+flamegraph.pl and speedscope) and a top-functions summary to ``logs/``.
+Nothing runs while it is off.
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+_root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LOG_DIR = os.path.join(_root_dir, "logs")
+
+
+def _frame_label(code):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """Sample all thread stacks every ``interval`` seconds for ``duration`` seconds"""
+
+    def __init__(self, interval=0.005, duration=10.0, out_dir=LOG_DIR, top=25):
+        self.interval = interval
+        self.duration = duration
+        self.out_dir = out_dir
+        self.top = top
+        self.last_report = None
+        self._stacks = Counter()
+        self._samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, duration=None, on_done=None):
+        """Begin sampling; ``on_done(paths)`` is called once the files are written"""
+        with self._lock:
+            if self.running:
+                return False
+            self._stacks = Counter()
+            self._samples = 0
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="SamplingProfiler", daemon=True,
+                                            args=(duration or self.duration, on_done))
+            self._thread.start()
+        print(f"[profiler] sampling for {duration or self.duration:g} s")
+        return True
+
+    def stop(self):
+        """End the sampling window early; the report is still written"""
+        self._stop.set()
+
+    def toggle(self, on_done=None):
+        """Start if idle, otherwise stop early. Returns True if it started."""
+        if self.running:
+            self.stop()
+            return False
+        return self.start(on_done=on_done)
+
+    def _run(self, duration, on_done):
+        me = threading.get_ident()
+        started = time.perf_counter()
+        deadline = started + duration
+        while not self._stop.is_set() and time.perf_counter() < deadline:
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                stack.append(names.get(ident, f"thread-{ident}"))
+                self._stacks[";".join(reversed(stack))] += 1
+            self._samples += 1
+            self._stop.wait(self.interval)
+
+        paths = self.write_report(time.perf_counter() - started)
+        self.last_report = paths
+        if on_done is not None:
+            try:
+                on_done(paths)
+            except Exception as e:
+                print(f"[profiler] completion callback failed: {e}")
+
+    def write_report(self, elapsed):
+        """Write the collapsed stacks and the top-functions summary"""
+        os.makedirs(self.out_dir, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        folded_path = os.path.join(self.out_dir, f"profile-{stamp}.folded")
+        summary_path = os.path.join(self.out_dir, f"profile-{stamp}.txt")
+
+        with open(folded_path, "w", encoding="utf-8") as f:
+            for stack, count in self._stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+        own, total = Counter(), Counter()
+        for stack, count in self._stacks.items():
+            frames = stack.split(";")[1:]
+            if not frames:
+                continue
+            own[frames[-1]] += count
+            for label in set(frames):
+                total[label] += count
+        stack_samples = sum(self._stacks.values()) or 1
+
+        lines = [f"Sampled {self._samples} times over {elapsed:.1f} s "
+                 f"(every {self.interval * 1000:.0f} ms, {stack_samples} thread stacks)", "",
+                 f"Top {self.top} functions by own samples:",
+                 f"{'own %':>7}{'total %':>9}  function"]
+        for label, count in own.most_common(self.top):
+            lines.append(f"{count / stack_samples:7.1%}{total[label] / stack_samples:9.1%}  {label}")
+        lines += ["", f"Top {self.top} functions by total samples (self + callees):"]
+        for label, count in total.most_common(self.top):
+            lines.append(f"{count / stack_samples:7.1%}  {label}")
+        with open(summary_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+
+        print(f"[profiler] wrote {folded_path} and {summary_path}")
+        return folded_path, summary_path
+
+
+# Shared instance used by the keyboard and voice toggles
+profiler = SamplingProfiler()
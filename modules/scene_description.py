@@ -1,36 +1,50 @@
 import cv2
 import numpy as np
-import os
-from ultralytics import YOLO
+from modules import model_registry
+from modules.frame_quality import BRIGHTNESS_THRESHOLDS, lighting_stats, edge_stats, to_gray
 
 class SceneDescriptor:
-    def __init__(self, yolo_model="models/yolov8n.pt"):
-        """Initialize scene descriptor with YOLO object detection"""
-        self.brightness_thresholds = {
-            'very_dark': 30,
-            'dark': 80,
-            'normal': 180,
-            'bright': 220
-        }
-
-        # Load YOLOv8
-        if os.path.isfile(yolo_model):
-            try:
-                self.model = YOLO(yolo_model)
-                print("[scene_description] YOLOv8 loaded.")
-            except Exception as e:
-                print(f"[scene_description] YOLO load failed: {e}")
-                self.model = None
-        else:
-            print("[scene_description] YOLOv8 model not found.")
-            self.model = None
-
-    def describe_scene(self, frame):
+    def __init__(self, yolo_model="models/yolov8n.pt", backend=None, precision=None):
+        """Initialize scene descriptor with YOLO object detection
+
+        backend: "torch", "onnx" or "openvino"; None uses the registry default
+        precision: "fp32" or "int8"; None uses the registry default
+        """
+        self.brightness_thresholds = dict(BRIGHTNESS_THRESHOLDS)
+
+        # YOLOv8 is shared through the model registry and loaded on first use
+        self.model_key = model_registry.acquire_model(yolo_model, backend, precision)
+
+    @property
+    def model(self):
+        if self.model_key is None:
+            return None
+        return model_registry.get_model(self.model_key)
+
+    def close(self):
+        """Release this descriptor's reference to the shared YOLO model"""
+        if self.model_key is not None:
+            model_registry.release_model(self.model_key)
+            self.model_key = None
+
+    def describe_scene(self, frame, frame_id=None, imgsz=None):
         """Generate full analysis of the scene"""
+        return self._describe(frame, self._detect_objects(frame, frame_id, imgsz))
+
+    def describe_scenes(self, frames, frame_ids=None):
+        """describe_scene for several frames with one batched YOLO call"""
+        model = self.model
+        if model is None:
+            return [self._describe(frame, {'detected': []}) for frame in frames]
+        batch = model_registry.predict_batch(self.model_key, frames, frame_ids, conf=0.5, iou=0.4)
+        return [self._describe(frame, self._objects_from_results(results, model))
+                for frame, results in zip(frames, batch)]
+
+    def _describe(self, frame, objects):
         description = {
             'lighting': self._analyze_lighting(frame),
             'colors': self._analyze_colors(frame),
-            'objects': self._detect_objects(frame),
+            'objects': objects,
             'text_present': self._detect_text(frame),
             'overall_description': ''
         }
@@ -39,23 +53,7 @@ class SceneDescriptor:
         return description
 
     def _analyze_lighting(self, frame):
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        avg_brightness = np.mean(gray)
-        brightness_std = np.std(gray)
-
-        if avg_brightness < self.brightness_thresholds['very_dark']:
-            condition = 'very dark'
-        elif avg_brightness < self.brightness_thresholds['dark']:
-            condition = 'dimly lit'
-        elif avg_brightness < self.brightness_thresholds['normal']:
-            condition = 'well-lit'
-        elif avg_brightness < self.brightness_thresholds['bright']:
-            condition = 'bright'
-        else:
-            condition = 'very bright'
-
-        evenness = 'even' if brightness_std < 40 else 'uneven'
-        return {'condition': condition, 'evenness': evenness, 'brightness_value': avg_brightness}
+        return lighting_stats(to_gray(frame), self.brightness_thresholds)
 
     def _analyze_colors(self, frame):
         """Find dominant colors using HSV histogram"""
@@ -80,29 +78,30 @@ class SceneDescriptor:
 
         return {'dominant_colors': list(set(color_names))}
 
-    def _detect_objects(self, frame):
+    def _detect_objects(self, frame, frame_id=None, imgsz=None):
         """Detect real-world objects with YOLOv8"""
-        if self.model is None:
+        model = self.model
+        if model is None:
             return {'detected': []}
 
-        # Run YOLOv8 inference
-        results = self.model.predict(frame, conf=0.5, iou=0.4)
+        options = {}
+        if imgsz and model_registry.accepts_imgsz(self.model_key):
+            options["imgsz"] = imgsz
+        # Same call as object_detector, so a frame already run there is reused
+        results = model_registry.predict(self.model_key, frame, frame_id, conf=0.5, iou=0.4, **options)
+        return self._objects_from_results(results, model)
 
+    def _objects_from_results(self, results, model):
+        class_ids = [r.boxes.cls.cpu().numpy() for r in results if r.boxes is not None]
         detected_objects = []
-        for result in results:
-            boxes = result.boxes
-            for box in boxes:
-                cls = int(box.cls[0].cpu().numpy())
-                label = self.model.names[cls]
-                detected_objects.append(label)
+        if class_ids:
+            detected_objects = [model.names[int(c)] for c in np.unique(np.concatenate(class_ids))]
 
-        return {'detected': list(set(detected_objects))}
+        return {'detected': detected_objects}
 
     def _detect_text(self, frame):
         """Quick check for text using edges (can be upgraded to EAST)"""
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        edges = cv2.Canny(gray, 100, 200)
-        text_pixels = np.sum(edges > 0)
+        text_pixels, _ = edge_stats(to_gray(frame))
         return {'likely_text_present': text_pixels > 5000}
 
     def _generate_description(self, analysis):
@@ -131,8 +130,14 @@ class SceneDescriptor:
 # Global instance
 scene_descriptor = SceneDescriptor()
 
-def describe_scene_for_blind_user(frame):
-    return scene_descriptor.describe_scene(frame)
+def warm_up():
+    return scene_descriptor.model is not None
+
+def describe_scene_for_blind_user(frame, frame_id=None, imgsz=None):
+    return scene_descriptor.describe_scene(frame, frame_id, imgsz)
+
+def describe_scenes_for_blind_user(frames, frame_ids=None):
+    return scene_descriptor.describe_scenes(frames, frame_ids)
 
-def get_quick_scene_description(frame):
-    return scene_descriptor.describe_scene(frame)['overall_description']
+def get_quick_scene_description(frame, frame_id=None):
+    return scene_descriptor.describe_scene(frame, frame_id)['overall_description']
@@ -0,0 +1,254 @@
+"""
+Optional multi-process inference pipeline
+
+Frames are written once into a shared-memory ring; detector and OCR worker
+processes read them in place and send back small, picklable result records.
+"""
+
+import importlib
+import itertools
+import multiprocessing as mp
+import threading
+import time
+from concurrent.futures import Future
+from multiprocessing import shared_memory
+
+import numpy as np
+
+_HEADER_DTYPE = np.dtype([("seq", np.int64), ("timestamp", np.float64)])
+
+# task -> (worker group, module, function, takes frame_id); each group runs
+# in its own processes
+TASKS = {
+    "objects": ("detector", "modules.object_detector", "detect_objects_in_frame", True),
+    "scene": ("detector", "modules.scene_description", "describe_scene_for_blind_user", True),
+    # Scores only; smoothing stays with the caller's CurrencySession
+    "currency": ("detector", "modules.currency_detector", "identify_currency_scores", True),
+    "ocr": ("ocr", "modules.ocr_reader", "read_text_from_frame", False),
+    "document_ocr": ("ocr", "modules.ocr_reader", "read_document_lines", False),
+}
+
+DEFAULT_WORKERS = {"detector": 1, "ocr": 1}
+
+
+class StaleFrame(Exception):
+    """The frame left the ring (or never got into it) before the task ran on it"""
+
+
+class SharedFrameRing:
+    """Fixed-shape frame slots in one shared-memory block.
+
+    Each slot has a header with the sequence number of the frame it holds
+    (-1 while empty or being written), so readers can check that the slot
+    still holds the frame they were asked to process.
+    """
+
+    def __init__(self, shape, slots=4, dtype=np.uint8, name=None):
+        self.shape = tuple(shape)
+        self.slots = slots
+        self.dtype = np.dtype(dtype)
+        frame_bytes = int(np.prod(self.shape)) * self.dtype.itemsize
+        header_bytes = _HEADER_DTYPE.itemsize * slots
+
+        self.owner = name is None
+        if self.owner:
+            self.shm = shared_memory.SharedMemory(create=True, size=header_bytes + frame_bytes * slots)
+        else:
+            # Workers are spawned from the owner and share its resource
+            # tracker, so attaching does not take over the block's cleanup
+            self.shm = shared_memory.SharedMemory(name=name)
+
+        self.header = np.ndarray((slots,), dtype=_HEADER_DTYPE, buffer=self.shm.buf)
+        self.frames = np.ndarray((slots,) + self.shape, dtype=self.dtype,
+                                 buffer=self.shm.buf, offset=header_bytes)
+        if self.owner:
+            self.header["seq"] = -1
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def spec(self):
+        """Arguments for attaching to this ring from another process"""
+        return (self.shape, self.slots, self.dtype.str, self.name)
+
+    def write(self, slot, seq, image, timestamp):
+        if image.shape != self.shape:
+            raise ValueError(f"frame shape {image.shape} does not match ring shape {self.shape}")
+        self.header["seq"][slot] = -1
+        np.copyto(self.frames[slot], image)
+        self.header["timestamp"][slot] = timestamp
+        self.header["seq"][slot] = seq
+
+    def view(self, slot, seq):
+        """Zero-copy view of ``seq`` in ``slot``, or None if it was replaced"""
+        if self.header["seq"][slot] != seq:
+            return None
+        return self.frames[slot]
+
+    def holds(self, slot, seq):
+        return self.header["seq"][slot] == seq
+
+    def close(self):
+        self.header = None
+        self.frames = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+def _worker_main(ring_spec, jobs, results):
+    shape, slots, dtype, name = ring_spec
+    ring = SharedFrameRing(shape, slots, dtype, name=name)
+    functions = {}
+
+    while True:
+        job = jobs.get()
+        if job is None:
+            break
+        job_id, task, slot, seq, roi, kwargs = job
+        started = time.perf_counter()
+
+        frame = ring.view(slot, seq)
+        if frame is None:
+            results.put((job_id, "stale", None, 0.0))
+            continue
+        if roi is not None:
+            y0, y1, x0, x1 = roi
+            frame = frame[y0:y1, x0:x1]
+
+        try:
+            if task not in functions:
+                _, module_name, function_name, keyed = TASKS[task]
+                functions[task] = (getattr(importlib.import_module(module_name), function_name), keyed)
+            function, keyed = functions[task]
+            # Whole-frame tasks share detections for the same seq in this worker
+            if keyed and roi is None:
+                result = function(frame, frame_id=seq, **kwargs)
+            else:
+                result = function(frame, **kwargs)
+            status = "ok"
+        except Exception as e:
+            result, status = f"{type(e).__name__}: {e}", "error"
+
+        if not ring.holds(slot, seq):
+            result, status = None, "stale"
+        results.put((job_id, status, result, time.perf_counter() - started))
+
+    frame = None
+    ring.close()
+
+
+class ProcessPipeline:
+    """Run model tasks in worker processes that share frames with this one.
+
+    ``publish()`` copies a captured frame into a free ring slot; ``submit()``
+    hands a task for that frame to its worker group and returns a Future.
+    Slots with jobs in flight are never overwritten, so workers can read
+    them without copying. When every slot is busy, ``publish()`` drops the
+    frame and returns False.
+    """
+
+    def __init__(self, frame_shape, workers=None, slots=None):
+        self.workers = dict(workers or DEFAULT_WORKERS)
+        slots = slots or sum(self.workers.values()) * 2 + 2
+        self.ring = SharedFrameRing(frame_shape, slots)
+        self.dropped = 0
+
+        ctx = mp.get_context("spawn")
+        self._results = ctx.Queue()
+        self._queues = {group: ctx.Queue() for group in self.workers}
+        self._procs = []
+        for group, count in self.workers.items():
+            for _ in range(count):
+                self._procs.append(ctx.Process(target=_worker_main, daemon=True,
+                                               args=(self.ring.spec(), self._queues[group], self._results)))
+
+        self._lock = threading.Lock()
+        self._pins = [0] * slots
+        self._slot_seq = [-1] * slots
+        self._seq_slot = {}
+        self._cursor = 0
+        self._futures = {}
+        self._job_ids = itertools.count()
+        self._collector = threading.Thread(target=self._collect, daemon=True)
+
+    def start(self):
+        for proc in self._procs:
+            proc.start()
+        self._collector.start()
+        print(f"[shm_pipeline] started {len(self._procs)} worker processes")
+
+    def publish(self, seq, image, timestamp=None):
+        with self._lock:
+            for offset in range(self.ring.slots):
+                slot = (self._cursor + offset) % self.ring.slots
+                if self._pins[slot] == 0:
+                    break
+            else:
+                self.dropped += 1
+                return False
+            self._cursor = slot + 1
+            self._seq_slot.pop(self._slot_seq[slot], None)
+            self._slot_seq[slot] = seq
+            self._seq_slot[seq] = slot
+            self.ring.write(slot, seq, image, time.time() if timestamp is None else timestamp)
+            return True
+
+    def submit(self, task, seq, roi=None, **kwargs):
+        """Queue ``task`` on published frame ``seq``.
+
+        ``roi`` is (y0, y1, x0, x1); ``kwargs`` are passed to the task function.
+        """
+        future = Future()
+        group = TASKS[task][0]
+        if group not in self._queues:
+            raise ValueError(f"No {group} workers for task {task!r}")
+        with self._lock:
+            slot = self._seq_slot.get(seq)
+            if slot is None:
+                future.set_exception(StaleFrame(f"frame {seq} is not in the ring"))
+                return future
+            job_id = next(self._job_ids)
+            self._pins[slot] += 1
+            self._futures[job_id] = (future, slot)
+        self._queues[group].put((job_id, task, slot, seq, roi, kwargs))
+        return future
+
+    def run(self, task, seq, roi=None, timeout=None, **kwargs):
+        return self.submit(task, seq, roi, **kwargs).result(timeout)
+
+    def _collect(self):
+        while True:
+            record = self._results.get()
+            if record is None:
+                return
+            job_id, status, result, _ = record
+            with self._lock:
+                future, slot = self._futures.pop(job_id, (None, None))
+                if future is None:
+                    continue
+                self._pins[slot] -= 1
+            if status == "error":
+                future.set_exception(RuntimeError(result))
+            elif status == "stale":
+                future.set_exception(StaleFrame("frame was overwritten while the task ran"))
+            else:
+                future.set_result(result)
+
+    def close(self):
+        for group, count in self.workers.items():
+            for _ in range(count):
+                self._queues[group].put(None)
+        for proc in self._procs:
+            proc.join(timeout=2.0)
+            if proc.is_alive():
+                proc.terminate()
+        self._results.put(None)
+        if self._collector.is_alive():
+            self._collector.join(timeout=1.0)
+        with self._lock:
+            for future, _ in self._futures.values():
+                future.cancel()
+            self._futures.clear()
+        self.ring.close()
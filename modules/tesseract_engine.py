@@ -0,0 +1,155 @@
+"""
+Tesseract OCR backend
+
+With ``tesserocr`` installed, Tesseract runs in-process: each thread keeps
+one ``PyTessBaseAPI`` handle (language data loaded once) and images are
+passed as raw pixel buffers. Otherwise it falls back to ``pytesseract``,
+which starts a ``tesseract`` process and writes temp files for every call;
+the binary is looked up on PATH and in the usual install locations.
+"""
+
+import os
+import shutil
+import threading
+
+import cv2
+import pytesseract
+from PIL import Image
+
+try:
+    import tesserocr
+except ImportError:
+    tesserocr = None
+
+# Checked after PATH, in order
+TESSERACT_LOCATIONS = [
+    r"C:\Program Files\Tesseract-OCR\tesseract.exe",
+    r"C:\Program Files (x86)\Tesseract-OCR\tesseract.exe",
+    "/usr/bin/tesseract",
+    "/usr/local/bin/tesseract",
+    "/opt/homebrew/bin/tesseract",
+]
+
+
+def find_tesseract_cmd():
+    """Path of the tesseract executable, or None if it is not installed"""
+    found = shutil.which("tesseract")
+    if found:
+        return found
+    for path in TESSERACT_LOCATIONS:
+        if os.path.isfile(path):
+            return path
+    return None
+
+
+_tesseract_cmd = find_tesseract_cmd()
+if _tesseract_cmd:
+    pytesseract.pytesseract.tesseract_cmd = _tesseract_cmd
+
+
+class TesseractEngine:
+    """Word-level Tesseract OCR, in-process when tesserocr is available"""
+
+    def __init__(self, lang="eng", psm=11, oem=3):
+        self.lang = lang
+        self.psm = psm
+        self.oem = oem
+        self.config = f"--oem {oem} --psm {psm}"
+        self.in_process = tesserocr is not None
+        self._local = threading.local()
+        self._handles = []
+        self._lock = threading.Lock()
+
+    def _api(self):
+        """This thread's API handle, created on first use"""
+        api = getattr(self._local, "api", None)
+        if api is None:
+            api = tesserocr.PyTessBaseAPI(lang=self.lang, psm=self.psm, oem=self.oem)
+            self._local.api = api
+            with self._lock:
+                self._handles.append(api)
+            print(f"[Tesseract] in-process engine ready ({threading.current_thread().name})")
+        return api
+
+    def words(self, image):
+        """[(word, confidence 0..1), ...] read from a gray or BGR image"""
+        if self.in_process:
+            try:
+                return self._words_in_process(image)
+            except Exception as e:
+                # e.g. tesserocr built against missing language data
+                print(f"[Tesseract] in-process engine failed, using pytesseract: {e}")
+                self.in_process = False
+        return self._words_subprocess(image)
+
+    @property
+    def available(self):
+        return self.in_process or _tesseract_cmd is not None
+
+    def word_boxes(self, image):
+        """[(word, confidence 0..1, (x0, y0, x1, y1)), ...] read from a gray or BGR image"""
+        if self.in_process:
+            try:
+                return self._word_boxes_in_process(image)
+            except Exception as e:
+                print(f"[Tesseract] in-process engine failed, using pytesseract: {e}")
+                self.in_process = False
+        return self._word_boxes_subprocess(image)
+
+    def _recognize(self, image):
+        api = self._api()
+        if image.ndim == 3:
+            image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        image = image if image.flags["C_CONTIGUOUS"] else image.copy()
+        height, width = image.shape[:2]
+        channels = 1 if image.ndim == 2 else image.shape[2]
+        # Raw pixels straight from the array: no PIL conversion, no temp file
+        api.SetImageBytes(image.tobytes(), width, height, channels, width * channels)
+        api.Recognize()
+        return api
+
+    def _words_in_process(self, image):
+        api = self._recognize(image)
+        return [(word, conf / 100.0) for word, conf in api.MapWordConfidences()
+                if word.strip() and conf >= 0]
+
+    def _word_boxes_in_process(self, image):
+        api = self._recognize(image)
+        level = tesserocr.RIL.WORD
+        boxes = []
+        for word in tesserocr.iterate_level(api.GetIterator(), level):
+            text = word.GetUTF8Text(level)
+            conf = word.Confidence(level)
+            if text and text.strip() and conf >= 0:
+                boxes.append((text, conf / 100.0, word.BoundingBox(level)))
+        return boxes
+
+    def _data(self, image):
+        pil_image = Image.fromarray(cv2.cvtColor(image, cv2.COLOR_BGR2RGB) if image.ndim == 3 else image)
+        data = pytesseract.image_to_data(pil_image, config=self.config,
+                                         output_type=pytesseract.Output.DICT)
+        # conf is -1 for layout rows that carry no word
+        return [i for i, (text, conf) in enumerate(zip(data["text"], data["conf"]))
+                if text.strip() and float(conf) >= 0], data
+
+    def _words_subprocess(self, image):
+        rows, data = self._data(image)
+        return [(data["text"][i], float(data["conf"][i]) / 100.0) for i in rows]
+
+    def _word_boxes_subprocess(self, image):
+        rows, data = self._data(image)
+        return [(data["text"][i], float(data["conf"][i]) / 100.0,
+                 (data["left"][i], data["top"][i],
+                  data["left"][i] + data["width"][i], data["top"][i] + data["height"][i]))
+                for i in rows]
+
+    def read_text(self, image):
+        return " ".join(word for word, _ in self.words(image))
+
+    def close(self):
+        """Release every thread's API handle"""
+        with self._lock:
+            handles, self._handles = self._handles, []
+        for api in handles:
+            api.End()
+        self._local = threading.local()
@@ -0,0 +1,154 @@
+"""
+Tiled OCR for high-resolution page photos
+
+A 12 MP photo run through OCR as one image is slow, single-threaded and
+needs memory proportional to the photo. Here the page is cut into
+overlapping tiles that are recognized in a thread pool, with only a bounded
+number of tiles in flight. Words come back with page coordinates; a word
+read twice where tiles overlap is kept once (preferring the copy not cut by
+a tile edge), and the words are put back in reading order line by line.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from modules.utils import clean_text
+
+# A word box this close to an inner tile edge may be cut off by it
+EDGE_MARGIN = 3
+
+
+def tile_grid(height, width, tile=1280, overlap=192):
+    """(y0, y1, x0, x1) tiles of at most ``tile`` px covering the image,
+    neighbours overlapping by at least ``overlap`` px"""
+    def starts(size):
+        if size <= tile:
+            return [0]
+        positions = list(range(0, size - tile + 1, tile - overlap))
+        if positions[-1] + tile < size:
+            positions.append(size - tile)
+        return positions
+
+    return [(y, min(y + tile, height), x, min(x + tile, width))
+            for y in starts(height) for x in starts(width)]
+
+
+class _Word:
+    __slots__ = ("text", "confidence", "box", "cut")
+
+    def __init__(self, text, confidence, box, cut):
+        self.text = text
+        self.confidence = confidence
+        self.box = box
+        self.cut = cut
+
+
+def _is_cut(box, tile, height, width):
+    """True if ``box`` (page coords) touches an edge of ``tile`` inside the page"""
+    x0, y0, x1, y1 = box
+    ty0, ty1, tx0, tx1 = tile
+    return ((tx0 > 0 and x0 - tx0 <= EDGE_MARGIN) or (tx1 < width and tx1 - x1 <= EDGE_MARGIN)
+            or (ty0 > 0 and y0 - ty0 <= EDGE_MARGIN) or (ty1 < height and ty1 - y1 <= EDGE_MARGIN))
+
+
+def _overlap_ratio(a, b):
+    """Intersection over the smaller of two (x0, y0, x1, y1) boxes"""
+    w = min(a[2], b[2]) - max(a[0], b[0])
+    h = min(a[3], b[3]) - max(a[1], b[1])
+    if w <= 0 or h <= 0:
+        return 0.0
+    smaller = min((a[2] - a[0]) * (a[3] - a[1]), (b[2] - b[0]) * (b[3] - b[1]))
+    return w * h / float(max(smaller, 1))
+
+
+def merge_tile_words(words, cell=64, min_overlap=0.5):
+    """Drop words read twice in tile overlaps.
+
+    Of two overlapping copies, the one not cut by a tile edge wins, then the
+    more confident one. Words are bucketed by box centre so each is only
+    compared with its neighbours.
+    """
+    ranked = sorted(words, key=lambda w: (w.cut, -w.confidence))
+    # Overlapping boxes have centres at most one box size apart
+    largest = max((max(w.box[2] - w.box[0], w.box[3] - w.box[1]) for w in words), default=0)
+    reach = largest // cell + 1
+    grid = {}
+    kept = []
+    for word in ranked:
+        x0, y0, x1, y1 = word.box
+        cx, cy = (x0 + x1) // 2 // cell, (y0 + y1) // 2 // cell
+        duplicate = any(_overlap_ratio(word.box, other.box) >= min_overlap
+                        for gx in range(cx - reach, cx + reach + 1)
+                        for gy in range(cy - reach, cy + reach + 1)
+                        for other in grid.get((gx, gy), ()))
+        if not duplicate:
+            kept.append(word)
+            grid.setdefault((cx, cy), []).append(word)
+    return kept
+
+
+def reading_order_lines(words):
+    """Group words into lines (top to bottom) of words (left to right)"""
+    lines = []
+    for word in sorted(words, key=lambda w: (w.box[1] + w.box[3]) / 2):
+        centre = (word.box[1] + word.box[3]) / 2
+        height = word.box[3] - word.box[1]
+        line = lines[-1] if lines else None
+        # Same line if the centre is within half a word height of the line's
+        if line is not None and abs(centre - line["centre"]) <= max(height, line["height"]) / 2:
+            line["words"].append(word)
+            n = len(line["words"])
+            line["centre"] += (centre - line["centre"]) / n
+            line["height"] += (height - line["height"]) / n
+        else:
+            lines.append({"words": [word], "centre": centre, "height": height})
+    return [" ".join(w.text for w in sorted(line["words"], key=lambda w: w.box[0]))
+            for line in lines]
+
+
+def read_tiled(image, recognize, tile=1280, overlap=192, workers=4, pool=None):
+    """OCR ``image`` tile by tile and return its lines in reading order.
+
+    recognize: callable(tile_image) -> [(text, confidence, (x0, y0, x1, y1))]
+        with boxes relative to the tile; called from ``workers`` threads
+    pool: executor to run the tiles on; pass one that outlives the call when
+        ``recognize`` keeps per-thread state (e.g. a Tesseract handle),
+        otherwise a pool of ``workers`` threads is made for this call only
+    At most ``workers * 2`` tiles are queued at once, and tiles are views of
+    ``image``, so memory beyond the image itself stays bounded.
+    """
+    height, width = image.shape[:2]
+    tiles = tile_grid(height, width, tile, overlap)
+    words = []
+    lock = threading.Lock()
+
+    def run(t):
+        y0, y1, x0, x1 = t
+        found = []
+        for text, confidence, (bx0, by0, bx1, by1) in recognize(image[y0:y1, x0:x1]):
+            text = clean_text(text)
+            if not text:
+                continue
+            box = (bx0 + x0, by0 + y0, bx1 + x0, by1 + y0)
+            found.append(_Word(text, float(confidence), box, _is_cut(box, t, height, width)))
+        with lock:
+            words.extend(found)
+
+    own_pool = pool is None
+    if own_pool:
+        pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="TiledOCR")
+    try:
+        pending = set()
+        for t in tiles:
+            if len(pending) >= workers * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    future.result()
+            pending.add(pool.submit(run, t))
+        for future in pending:
+            future.result()
+    finally:
+        if own_pool:
+            pool.shutdown()
+
+    return reading_order_lines(merge_tile_words(words))
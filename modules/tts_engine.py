@@ -1,5 +1,8 @@
 import pyttsx3
 import threading
+import time
+
+from modules import latency_trace
 
 _engine = None
 _rate = 150
@@ -22,10 +25,15 @@ def set_rate(rate: int):
 def speak_text(text: str, async_mode: bool = True):
     if not text:
         return
+    # Speech triggered while processing a frame is timed against its capture
+    trace = latency_trace.current()
+    requested_at = time.time()
     def run():
         try:
             eng = _get_engine()
             eng.say(text)
+            if trace is not None:
+                trace.speech_started(text, requested_at)
             eng.runAndWait()
         except Exception:
             pass
@@ -3,6 +3,8 @@ Utility functions for OCR Reader
 """
 
 import os
+import sys
+import time
 
 def clean_text(text):
     """Remove unwanted characters"""
@@ -23,3 +25,47 @@ def limit_text_length(text, max_length=500):
     if len(text) > max_length:
         return text[:max_length] + "..."
     return text
+
+class BootTimer:
+    """Record named startup phases and report them against a time budget"""
+
+    def __init__(self, budget_seconds=None):
+        self.budget_seconds = budget_seconds
+        self.started = time.perf_counter()
+        self._last = self.started
+        self.phases = []
+
+    def mark(self, phase):
+        """Close the current phase under ``phase`` and start the next one"""
+        now = time.perf_counter()
+        self.phases.append((phase, now - self._last))
+        self._last = now
+        return now - self.started
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def report(self):
+        lines = [f"  {name:<28}{seconds * 1000:8.0f} ms" for name, seconds in self.phases]
+        total = self.elapsed()
+        summary = f"  {'total':<28}{total * 1000:8.0f} ms"
+        if self.budget_seconds is not None:
+            status = "within" if total <= self.budget_seconds else "OVER"
+            summary += f"  ({status} {self.budget_seconds * 1000:.0f} ms budget)"
+        return "\n".join(["Startup timing:"] + lines + [summary])
+
+def rss_mb():
+    """Current resident memory of this process in MB"""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / 1e6
+    except ImportError:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+
+def peak_rss_mb():
+    """Peak resident memory of this process in MB"""
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes on Linux
+    return peak / 1e6 if sys.platform == "darwin" else peak / 1e3
@@ -1,11 +1,16 @@
-# Add these imports at the top (below existing ones)
+# speech_recognition and the navigation module are imported where they are
+# used, so importing this module does not touch the audio stack
 from modules.tts_engine import speak_text
-import speech_recognition as sr
-from modules.navigation.navigation_mode import start_navigation
 
 commands = {}
+wake_listeners = []
 
 def register_voice_command(phrase, callback): commands[phrase.lower()] = callback
+
+def register_wake_listener(callback):
+    """Call ``callback()`` whenever the wake word is heard, before its command runs"""
+    wake_listeners.append(callback)
+
 _listening = False
 
 def start_voice_listening():
@@ -26,6 +31,8 @@ def start_voice_listening():
                     text = r.recognize_google(audio).lower().strip()
                     print(f"[Voice] Heard: {text}")
                     if text.startswith("viso"):
+                        for listener in wake_listeners:
+                            listener()
                         cmd = text.replace("viso", "", 1).strip()
                         cb = commands.get(cmd)
                         if cb: cb()
@@ -45,7 +52,10 @@ def stop_voice_listening():
 
 def activate_navigation_mode():
     """Activates Navigation Mode through voice input."""
+    import speech_recognition as sr
     try:
+        from modules.navigation.navigation_mode import start_navigation
+
         speak_text("Navigation mode activated. Where would you like to go?")
         r = sr.Recognizer()
         mic = sr.Microphone()
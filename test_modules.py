@@ -110,6 +110,477 @@ def test_object_detection():
         print(f"✗ Object detection test failed: {e}")
         return False
 
+def test_model_registry():
+    """Test that the model registry shares one model per weights file"""
+    print("\nTesting Model Registry...")
+    
+    try:
+        import tempfile
+        from modules import model_registry
+        
+        loads = []
+        def fake_loader(path):
+            loads.append(path)
+            return object()
+        
+        with tempfile.NamedTemporaryFile(suffix=".pt") as weights:
+            first = model_registry.acquire_model(weights.name)
+            second = model_registry.acquire_model(weights.name)
+            model_a = model_registry.get_model(first, loader=fake_loader)
+            model_b = model_registry.get_model(second, loader=fake_loader)
+            
+            if model_a is not model_b or len(loads) != 1:
+                print("✗ Model registry loaded the same weights twice")
+                return False
+            
+            model_registry.release_model(first)
+            if not model_registry.loaded_models():
+                print("✗ Model unloaded while still referenced")
+                return False
+            
+            model_registry.release_model(second)
+            if model_registry.loaded_models():
+                print("✗ Model not unloaded after last release")
+                return False
+        
+        print("✓ Model registry sharing and reference counting working")
+        return True
+        
+    except Exception as e:
+        print(f"✗ Model registry test failed: {e}")
+        return False
+
+def test_batch_predict():
+    """Test that batched predictions are shared with per-frame calls"""
+    print("\nTesting batched prediction...")
+    
+    try:
+        import tempfile
+        from modules import model_registry
+        
+        calls = []
+        class FakeModel:
+            def predict(self, source, **kwargs):
+                frames = source if isinstance(source, list) else [source]
+                calls.append(len(frames))
+                return [f"result {frame}" for frame in frames]
+        
+        with tempfile.NamedTemporaryFile(suffix=".pt") as weights:
+            key = model_registry.acquire_model(weights.name)
+            model_registry.get_model(key, loader=lambda path: FakeModel())
+            batch = model_registry.predict_batch(key, [1, 2, 3], frame_ids=[101, 102, 103], conf=0.5)
+            single = model_registry.predict(key, 2, frame_id=102, conf=0.5)
+            model_registry.release_model(key)
+        
+        if calls != [3] or batch[1] != single or single != ["result 2"]:
+            print(f"✗ Batched prediction not shared (calls: {calls})")
+            return False
+        
+        print("✓ Batched prediction and per-frame cache working")
+        return True
+        
+    except Exception as e:
+        print(f"✗ Batched prediction test failed: {e}")
+        return False
+
+def test_document_buffer():
+    """Test that repeated, slightly different OCR lines are spoken once"""
+    print("\nTesting document line buffer...")
+    
+    try:
+        from modules.document_buffer import DocumentBuffer
+        
+        buffer = DocumentBuffer(max_lines=10, confirmations=2)
+        first = buffer.observe(["Chapter One", "The quick brown fox"])
+        second = buffer.observe(["Chapter 0ne", "The quick brown fox"])
+        third = buffer.observe(["Chapter One", "The quick brown fox"])
+        
+        if first or second != ["Chapter One", "The quick brown fox"] or third:
+            print(f"✗ Lines not confirmed once ({first}, {second}, {third})")
+            return False
+        if buffer.full_text() != "Chapter One The quick brown fox":
+            print(f"✗ Unexpected page text: {buffer.full_text()}")
+            return False
+        
+        print("✓ Document line buffer working")
+        return True
+        
+    except Exception as e:
+        print(f"✗ Document buffer test failed: {e}")
+        return False
+
+def test_idle_frame_rate():
+    """Test that an idle motion gate really slows the capture thread down"""
+    print("\nTesting idle frame rate...")
+    
+    try:
+        import time
+        import numpy as np
+        from modules.frame_capture import FrameCapture
+        from modules.motion_gate import MotionGate
+        
+        class CountingCamera:
+            reads = 0
+            def read(self):
+                self.reads += 1
+                return True, np.zeros((48, 64, 3), dtype=np.uint8)
+            def release(self):
+                pass
+        
+        gate = MotionGate(idle_after=0.01, idle_fps=10)
+        gate.changed(np.zeros((48, 64, 3), dtype=np.uint8))
+        time.sleep(0.02)
+        gate.changed(np.zeros((48, 64, 3), dtype=np.uint8))
+        
+        cap = FrameCapture()
+        cap.cap = CountingCamera()
+        cap.set_frame_interval(gate.frame_interval())
+        cap.start()
+        # The main loop keeps asking for the same idle rate on every frame
+        started = time.time()
+        while time.time() - started < 0.5:
+            if cap.read(timeout=0.5) is not None:
+                cap.set_frame_interval(gate.frame_interval())
+        cap.release()
+        
+        if not gate.idle or cap.cap.reads > 8:
+            print(f"✗ Idle capture not throttled ({cap.cap.reads} reads in 0.5 s at 10 fps)")
+            return False
+        
+        print("✓ Idle frame rate working")
+        return True
+        
+    except Exception as e:
+        print(f"✗ Idle frame rate test failed: {e}")
+        return False
+
+def test_currency_session():
+    """Test that the ring-buffer smoothing averages exactly the last N frames"""
+    print("\nTesting currency smoothing session...")
+    
+    try:
+        from modules.currency_detector import CurrencySession, CURRENCY_CLASSES
+        
+        rng = np.random.default_rng(7)
+        session = CurrencySession(history=3)
+        seen = []
+        for _ in range(7):
+            scores = rng.random(len(CURRENCY_CLASSES))
+            seen.append(scores)
+            result = session.update(scores)
+            expected = np.mean(seen[-3:], axis=0)
+            if not np.isclose(result["confidence"], expected.max()):
+                print(f"✗ Smoothed confidence {result['confidence']:.4f}, expected {expected.max():.4f}")
+                return False
+        
+        session.reset()
+        result = session.update(seen[0])
+        if not np.isclose(result["confidence"], seen[0].max()):
+            print("✗ Reset session still averages old frames")
+            return False
+        
+        print("✓ Currency smoothing session working")
+        return True
+        
+    except Exception as e:
+        print(f"✗ Currency session test failed: {e}")
+        return False
+
+def test_currency_consensus():
+    """Test that a steady note is announced once after K agreeing frames"""
+    print("\nTesting currency consensus...")
+    
+    try:
+        from modules.currency_detector import CurrencyConsensus, CURRENCY_CLASSES
+        
+        vote = CurrencyConsensus(frames=4)
+        frame = np.full((120, 160, 3), 90, dtype=np.uint8)
+        scores = np.zeros(len(CURRENCY_CLASSES), dtype=np.float32)
+        scores[CURRENCY_CLASSES.index("100")] = 1.0
+        
+        announced = [vote.update(frame, scores)[1] for _ in range(6)]
+        if announced != [False, False, False, True, False, False]:
+            print(f"✗ Expected one announcement on the 4th frame, got {announced}")
+            return False
+        if vote.locked != "100" or vote.needs_inference(frame):
+            print("✗ Unchanged note is still sent for inference")
+            return False
+        
+        print("✓ Currency consensus working")
+        return True
+        
+    except Exception as e:
+        print(f"✗ Currency consensus test failed: {e}")
+        return False
+
+def test_resolution_controller():
+    """Test that a mode's imgsz steps down over budget and back up with headroom"""
+    print("\nTesting resolution controller...")
+    
+    try:
+        from modules.resolution_controller import ResolutionController
+        
+        controller = ResolutionController(budgets={"navigation": 100}, window=4)
+        start = controller.imgsz("navigation")
+        for _ in range(4):
+            controller.record("navigation", 200)
+        lowered = controller.imgsz("navigation")
+        for _ in range(4):
+            controller.record("navigation", 20)
+        raised = controller.imgsz("navigation")
+        
+        if not (lowered < start and raised == start):
+            print(f"✗ imgsz went {start} -> {lowered} -> {raised}")
+            return False
+        
+        print("✓ Resolution controller working")
+        return True
+        
+    except Exception as e:
+        print(f"✗ Resolution controller test failed: {e}")
+        return False
+
+def test_ocr_word_merge():
+    """Test that merging two engines' words keeps the more confident reading"""
+    print("\nTesting OCR word merge...")
+    
+    try:
+        from modules.ocr_engines import merge_words
+        
+        easyocr_words = [("Total", 0.6), ("amount", 0.9), ("due", 0.4)]
+        tesseract_words = [("total", 0.95), ("amount", 0.5), ("dve", 0.2)]
+        merged = merge_words(easyocr_words, tesseract_words)
+        
+        if merged != [("total", 0.95), ("amount", 0.9), ("due", 0.4)]:
+            print(f"✗ Unexpected merge: {merged}")
+            return False
+        
+        print("✓ OCR word merge working")
+        return True
+        
+    except Exception as e:
+        print(f"✗ OCR word merge test failed: {e}")
+        return False
+
+def test_tiled_ocr_merge():
+    """Test that words read twice in tile overlaps are kept once"""
+    print("\nTesting tiled OCR merge...")
+    
+    try:
+        from modules.tiled_ocr import read_tiled, tile_grid
+        
+        height, width = 1000, 2000
+        tiles = tile_grid(height, width, tile=1280, overlap=192)
+        if len(tiles) != 2 or tiles[0][3] <= tiles[1][2]:
+            print(f"✗ Tiles do not overlap: {tiles}")
+            return False
+        
+        # Each pixel holds its own (y, x), so a tile knows where it sits on the page
+        ys, xs = np.mgrid[0:height, 0:width]
+        page = np.dstack([ys, xs]).astype(np.int32)
+        # One word per tile, one inside the overlap, one cut by the first tile's edge
+        words = [("left", 0.9, (100, 400, 220, 440)), ("middle", 0.9, (800, 400, 950, 440)),
+                 ("edge", 0.9, (1240, 400, 1320, 440)), ("right", 0.9, (1800, 400, 1900, 440))]
+        
+        def recognize(tile_image):
+            y0, x0 = tile_image[0, 0]
+            h, w = tile_image.shape[:2]
+            found = []
+            for text, confidence, (bx0, by0, bx1, by1) in words:
+                cx0, cx1 = max(bx0, x0), min(bx1, x0 + w)
+                if cx0 < cx1:
+                    # A clipped word comes back as a fragment
+                    fragment = text if (cx0, cx1) == (bx0, bx1) else text[:2]
+                    found.append((fragment, confidence, (cx0 - x0, by0 - y0, cx1 - x0, by1 - y0)))
+            return found
+        
+        lines = read_tiled(page, recognize, tile=1280, overlap=192, workers=2)
+        if lines != ["left middle edge right"]:
+            print(f"✗ Unexpected tiled lines: {lines}")
+            return False
+        
+        print("✓ Tiled OCR merge working")
+        return True
+        
+    except Exception as e:
+        print(f"✗ Tiled OCR merge test failed: {e}")
+        return False
+
+def test_currency_cascade_imgsz():
+    """Test that the cascade stages stay small when the resolution controller is on"""
+    print("\nTesting currency cascade input sizes...")
+    
+    try:
+        import tempfile
+        from types import SimpleNamespace
+        from modules import model_registry
+        from modules import currency_detector
+        from modules.currency_detector import CurrencyCascade, CurrencySession
+        from modules.resolution_controller import ResolutionController
+        
+        sizes = []
+        class FakeModel:
+            def predict(self, frame, imgsz=None, **kwargs):
+                sizes.append(imgsz)
+                # One confident "100" note in the middle of whatever it is shown
+                h, w = frame.shape[:2]
+                data = np.array([[w * 0.25, h * 0.25, w * 0.75, h * 0.75, 0.9, 2]], dtype=np.float32)
+                boxes = SimpleNamespace(cpu=lambda: SimpleNamespace(numpy=lambda: data))
+                return [SimpleNamespace(boxes=SimpleNamespace(data=boxes))]
+        
+        controller = ResolutionController()
+        frame = np.random.default_rng(3).integers(0, 255, (480, 640, 3), dtype=np.uint8)
+        with tempfile.NamedTemporaryFile(suffix=".pt") as weights:
+            key = model_registry.acquire_model(weights.name)
+            model_registry.get_model(key, loader=lambda path: FakeModel())
+            saved = currency_detector._model_keys[None]
+            currency_detector._model_keys[None] = key
+            try:
+                cascade = CurrencyCascade()
+                cascade._classifier_loaded = True
+                cascade.scores(frame, CurrencySession(), imgsz=controller.imgsz("currency"))
+                full = list(sizes)
+                for _ in range(controller.window):
+                    controller.record("currency", 10000)
+                del sizes[:]
+                cascade.scores(frame, CurrencySession(), imgsz=controller.imgsz("currency"))
+                lowered = list(sizes)
+            finally:
+                currency_detector._model_keys[None] = saved
+                model_registry.release_model(key)
+        
+        limits = [currency_detector.LOCALIZER_IMGSZ, currency_detector.CLASSIFIER_IMGSZ]
+        if full != limits or not all(low < size for low, size in zip(lowered, full)):
+            print(f"✗ Stage sizes {full} at full resolution, {lowered} after stepping down")
+            return False
+        
+        print("✓ Currency cascade input sizes working")
+        return True
+        
+    except Exception as e:
+        print(f"✗ Currency cascade test failed: {e}")
+        return False
+
+def test_ocr_first_policy():
+    """Test that a fast but unsure engine does not beat a confident one"""
+    print("\nTesting OCR first-result policy...")
+    
+    try:
+        import time
+        from modules.ocr_engines import OCREngineExecutor
+        
+        def slow_confident(image):
+            time.sleep(0.2)
+            return [("Paracetamol", 0.95), ("500", 0.9), ("mg", 0.95)]
+        
+        def fast_unsure(image):
+            return [("Parac", 0.05), ("S00", 0.05)]
+        
+        def fast_sure(image):
+            return [("Paracetamol", 0.8)]
+        
+        executor = OCREngineExecutor({"easyocr": slow_confident, "tesseract": fast_unsure}, policy="first")
+        words = executor.run(None)
+        executor.shutdown()
+        if words != slow_confident(None):
+            print(f"✗ Low-confidence early reading won: {words}")
+            return False
+        
+        executor = OCREngineExecutor({"easyocr": slow_confident, "tesseract": fast_sure}, policy="first")
+        started = time.time()
+        words = executor.run(None)
+        executor.shutdown()
+        if words != fast_sure(None) or time.time() - started >= 0.2:
+            print(f"✗ Confident early reading did not win at once: {words}")
+            return False
+        
+        print("✓ OCR first-result policy working")
+        return True
+        
+    except Exception as e:
+        print(f"✗ OCR first-result policy test failed: {e}")
+        return False
+
+def test_ocr_result_cache():
+    """Test that a steady page hits the OCR cache but a changed digit does not"""
+    print("\nTesting OCR result cache...")
+    
+    try:
+        from modules.ocr_reader import OCRResultCache
+        
+        def label(dosage, noise=0):
+            page = np.full((480, 640), 235, dtype=np.uint8)
+            for i, line in enumerate(["Paracetamol tablets IP", f"Dosage {dosage} mg",
+                                      "Take one tablet every six hours"]):
+                cv2.putText(page, line, (30, 80 + i * 60), cv2.FONT_HERSHEY_SIMPLEX, 0.7, 20, 2)
+            noisy = page + np.random.default_rng(noise).normal(0, noise, page.shape)
+            return np.clip(noisy, 0, 255).astype(np.uint8)
+        
+        cache = OCRResultCache()
+        reads = []
+        def read(text):
+            return lambda: reads.append(text) or text
+        
+        cache.get_or_compute("frame", label(500), read("Dosage 500 mg"))
+        steady = cache.get_or_compute("frame", label(500, noise=4), read("again"))
+        changed = cache.get_or_compute("frame", label(600), read("Dosage 600 mg"))
+        
+        if steady != "Dosage 500 mg" or changed != "Dosage 600 mg" or len(reads) != 2:
+            print(f"✗ Unexpected cache results ({steady!r}, {changed!r}, {len(reads)} reads)")
+            return False
+        
+        print("✓ OCR result cache working")
+        return True
+        
+    except Exception as e:
+        print(f"✗ OCR result cache test failed: {e}")
+        return False
+
+def test_incremental_ocr_change():
+    """Test that a tracked line is read again when its text changes"""
+    print("\nTesting incremental OCR line changes...")
+    
+    try:
+        from types import SimpleNamespace
+        from modules.incremental_ocr import IncrementalOCR
+        
+        box = (10, 430, 15, 55)
+        shown = {}
+        def render(text, noise=0):
+            shown["text"] = text
+            page = np.full((120, 480), 235, dtype=np.uint8)
+            cv2.putText(page, text, (15, 45), cv2.FONT_HERSHEY_SIMPLEX, 0.7, 20, 2)
+            noisy = page + np.random.default_rng(noise).normal(0, noise, page.shape)
+            return np.clip(noisy, 0, 255).astype(np.uint8)
+        
+        # Stand-in for EasyOCR: one text box, "recognizing" whatever was drawn
+        easyocr = SimpleNamespace(
+            detect=lambda gray: ([[box]], [[]]),
+            recognize=lambda gray, horizontal_list, free_list, batch_size: [
+                ([[b[0], b[2]], [b[1], b[2]], [b[1], b[3]], [b[0], b[3]]], shown["text"], 0.9)
+                for b in horizontal_list])
+        reader = SimpleNamespace(easyocr_reader=easyocr, _preprocess_image=lambda frame: frame)
+        ocr = IncrementalOCR(reader, redetect_every=100)
+        
+        first = ocr.read_lines(render("Chapter one begins here today"))
+        steady = ocr.read_lines(render("Chapter one begins here today", noise=4))
+        reused = ocr.stats["reused"]
+        changed = ocr.read_lines(render("Chapter two begins here later"))
+        digit = ocr.read_lines(render("Chapter two begins here 1ater"))
+        
+        if (first != ["Chapter one begins here today"] or reused != 1
+                or steady != first or changed != ["Chapter two begins here later"]
+                or digit != ["Chapter two begins here 1ater"]):
+            print(f"✗ Unexpected lines: {first}, {steady}, {changed}, {digit} ({reused} reused)")
+            return False
+        
+        print("✓ Incremental OCR line changes working")
+        return True
+        
+    except Exception as e:
+        print(f"✗ Incremental OCR test failed: {e}")
+        return False
+
 def test_voice_commands():
     """Test voice command setup"""
     print("\nTesting Voice Command setup...")
@@ -139,6 +610,19 @@ def main():
         ("OCR Functionality", test_ocr),
         ("TTS Functionality", test_tts),
         ("Object Detection", test_object_detection),
+        ("Model Registry", test_model_registry),
+        ("Batched Prediction", test_batch_predict),
+        ("Document Buffer", test_document_buffer),
+        ("Idle Frame Rate", test_idle_frame_rate),
+        ("Currency Session", test_currency_session),
+        ("Currency Consensus", test_currency_consensus),
+        ("Resolution Controller", test_resolution_controller),
+        ("OCR Word Merge", test_ocr_word_merge),
+        ("Tiled OCR Merge", test_tiled_ocr_merge),
+        ("Currency Cascade Sizes", test_currency_cascade_imgsz),
+        ("OCR First Policy", test_ocr_first_policy),
+        ("OCR Result Cache", test_ocr_result_cache),
+        ("Incremental OCR Changes", test_incremental_ocr_change),
         ("Voice Commands", test_voice_commands)
     ]
     